@@ -0,0 +1,302 @@
+import inspect
+import json
+import logging
+import os
+import traceback
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# torch | int8 | onnx
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", "onnx_models")
+# Directory of saved models, one sub-directory per model name ("/" replaced by "__");
+# a model found there is loaded from disk with no hub lookups
+MODEL_DIR = os.getenv("MODEL_DIR", "")
+# Never contact the Hugging Face hub, even for models missing from MODEL_DIR
+MODEL_OFFLINE = os.getenv("MODEL_OFFLINE", "0") == "1"
+
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def local_model_path(model_name: str, model_dir: Optional[str] = None) -> str:
+    return os.path.join(model_dir or MODEL_DIR, model_name.replace("/", "__"))
+
+
+def load_sentence_transformer(model_name: str, device: str = "cpu"):
+    local_path = local_model_path(model_name) if MODEL_DIR else None
+    if local_path is not None and not os.path.isdir(local_path):
+        local_path = None
+    if local_path is not None or MODEL_OFFLINE:
+        # Read when huggingface_hub is first imported, which the lazy import below guarantees.
+        # sentence-transformers 2.2.2 has no local_files_only argument, so these flags are
+        # what keeps the load off the network.
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+    from sentence_transformers import SentenceTransformer
+    if local_path is not None:
+        logger.info(f"Loading {model_name} from {local_path}")
+        return SentenceTransformer(local_path, device=device)
+    return SentenceTransformer(model_name, device=device)
+
+
+def save_model_bundle(model_name: str, model_dir: str) -> str:
+    """Download model_name and save it under model_dir for offline loading; returns its path."""
+    from sentence_transformers import SentenceTransformer
+    path = local_model_path(model_name, model_dir)
+    SentenceTransformer(model_name, device="cpu").save(path)
+    return path
+
+
+def quantize_int8(model):
+    """Swap every nn.Linear for a dynamically quantized int8 version, in place."""
+    import torch
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+class OnnxEncoder:
+    """Runs a SentenceTransformer's transformer under onnxruntime on CPU.
+
+    Tokenisation, pooling and normalisation reproduce the original model's
+    modules so ``encode`` is a drop-in replacement for the calls made in
+    this repo.
+    """
+    def __init__(self, model, onnx_path: str):
+        import onnxruntime
+
+        transformer = model[0]
+        self.tokenizer = transformer.tokenizer
+        self.max_seq_length = transformer.max_seq_length
+        self.pooling_mode = "mean"
+        self.normalize = False
+        for module in list(model)[1:]:
+            name = type(module).__name__
+            if name == "Pooling":
+                config = module.get_config_dict()
+                if config.get("pooling_mode_cls_token"):
+                    self.pooling_mode = "cls"
+                elif config.get("pooling_mode_max_tokens"):
+                    self.pooling_mode = "max"
+            elif name == "Normalize":
+                self.normalize = True
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = int(os.getenv("TORCH_NUM_THREADS", "1"))
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def _pool(self, hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        if self.pooling_mode == "cls":
+            return hidden[:, 0]
+        mask = mask[..., None].astype(hidden.dtype)
+        if self.pooling_mode == "max":
+            return np.where(mask > 0, hidden, -1e9).max(axis=1)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True,
+               convert_to_tensor: bool = False, normalize_embeddings: bool = False, **kwargs):
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+        # Sort by length like SentenceTransformer.encode to reduce padding
+        order = np.argsort([-len(s) for s in sentences], kind="stable")
+        outputs = []
+        for start in range(0, len(sentences), batch_size):
+            batch = [sentences[i] for i in order[start:start + batch_size]]
+            features = self.tokenizer(batch, padding=True, truncation=True,
+                                      max_length=self.max_seq_length, return_tensors="np")
+            feeds = {name: features[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            outputs.append(self._pool(hidden, features["attention_mask"]))
+        if outputs:
+            embeddings = np.concatenate(outputs)[np.argsort(order)].astype(np.float32)
+        else:
+            embeddings = np.empty((0, 0), dtype=np.float32)
+        if self.normalize or normalize_embeddings:
+            embeddings = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        if single:
+            embeddings = embeddings[0]
+        if convert_to_tensor:
+            import torch
+            return torch.from_numpy(embeddings)
+        return embeddings
+
+
+def export_onnx(model, onnx_path: str):
+    """Export the transformer of a SentenceTransformer to ONNX (last hidden state)."""
+    import torch
+
+    transformer = model[0]
+    auto_model = transformer.auto_model
+    input_names = [name for name in transformer.tokenizer.model_input_names
+                   if name in ("input_ids", "attention_mask", "token_type_ids")]
+
+    class HiddenStates(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *inputs):
+            return self.inner(**dict(zip(input_names, inputs)))[0]
+
+    dummy = transformer.tokenizer(["hello world"], return_tensors="pt")
+    args = tuple(dummy[name] for name in input_names)
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # The TorchScript exporter handles HF models without extra dependencies
+        kwargs["dynamo"] = False
+    os.makedirs(os.path.dirname(onnx_path) or ".", exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            HiddenStates(auto_model.eval()), args, onnx_path,
+            input_names=input_names, output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes, opset_version=14, **kwargs
+        )
+
+
+def load_backend(model_name: str, backend: Optional[str] = None, device: str = "cpu"):
+    """Load model_name for inference with the configured backend.
+
+    Every backend returns an object with a SentenceTransformer compatible
+    ``encode`` method and a ``tokenizer`` attribute.
+    """
+    backend = backend or INFERENCE_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+    logger.info(f"Loading {model_name} with the {backend} backend...")
+    model = load_sentence_transformer(model_name, device=device)
+    if backend == "int8":
+        return quantize_int8(model)
+    if backend == "onnx":
+        onnx_path = os.path.join(ONNX_CACHE_DIR, model_name.replace("/", "__"), "model.onnx")
+        if not os.path.exists(onnx_path):
+            logger.info(f"Exporting {model_name} to {onnx_path}...")
+            export_onnx(model, onnx_path)
+        return OnnxEncoder(model, onnx_path)
+    return model
+
+
+def build_standin_model(path: str, dim: int = 32, layers: int = 2,
+                        vocabulary: Optional[List[str]] = None, seed: Optional[int] = None):
+    """Build and save a tiny randomly initialised BERT SentenceTransformer.
+
+    It needs no network access and is used to exercise the backends and the
+    parity check locally. ``vocabulary`` replaces the built-in word list and
+    ``seed`` makes the weights reproducible.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    if vocabulary is None:
+        vocabulary = ("experience python java sql team lead managed developed skills data software "
+                      "engineer years project design cloud aws required the a and of to in for with").split()
+    characters = list("abcdefghijklmnopqrstuvwxyz0123456789")
+    vocab = list(dict.fromkeys(
+        ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + list(vocabulary) + characters + ["##" + c for c in characters]
+    ))
+    hf_path = os.path.join(path, "hf")
+    os.makedirs(hf_path, exist_ok=True)
+    with open(os.path.join(hf_path, "vocab.txt"), "w", encoding="utf-8") as vocab_file:
+        vocab_file.write("\n".join(vocab))
+    tokenizer = BertTokenizerFast(vocab_file=os.path.join(hf_path, "vocab.txt"))
+    if seed is not None:
+        torch.manual_seed(seed)
+    config = BertConfig(vocab_size=len(vocab), hidden_size=dim, num_hidden_layers=layers,
+                        num_attention_heads=2, intermediate_size=dim * 2,
+                        max_position_embeddings=256)
+    BertModel(config).save_pretrained(hf_path)
+    tokenizer.save_pretrained(hf_path)
+
+    transformer = models.Transformer(hf_path, max_seq_length=256)
+    model = SentenceTransformer(
+        modules=[transformer, models.Pooling(dim), models.Normalize()], device="cpu"
+    )
+    model.save(path)
+    return model
+
+
+def check_parity(reference, candidate, resumes: List[str], jobs: List[str]) -> Dict:
+    """Compare a candidate backend against the fp32 reference on a test corpus.
+
+    Reports embedding drift (1 - cosine between the two backends' vectors),
+    drift of resume x job cosine similarities and drift of the 0-100 match
+    score computed the way enhance_resume does.
+    """
+    def normalized(embeddings):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+    ref_resumes, cand_resumes = normalized(reference.encode(resumes)), normalized(candidate.encode(resumes))
+    ref_jobs, cand_jobs = normalized(reference.encode(jobs)), normalized(candidate.encode(jobs))
+
+    embedding_drift = 1 - np.concatenate([
+        (ref_resumes * cand_resumes).sum(axis=1), (ref_jobs * cand_jobs).sum(axis=1)
+    ])
+    ref_sim = ref_resumes @ ref_jobs.T
+    cand_sim = cand_resumes @ cand_jobs.T
+    ref_scores = ((ref_sim.max(axis=0).mean() + 1) * 50)
+    cand_scores = ((cand_sim.max(axis=0).mean() + 1) * 50)
+
+    return {
+        "sentences": len(resumes) + len(jobs),
+        "embedding_drift_mean": float(embedding_drift.mean()),
+        "embedding_drift_max": float(embedding_drift.max()),
+        "similarity_drift_mean": float(np.abs(ref_sim - cand_sim).mean()),
+        "similarity_drift_max": float(np.abs(ref_sim - cand_sim).max()),
+        "match_score_reference": float(ref_scores),
+        "match_score_candidate": float(cand_scores),
+        "match_score_drift": float(abs(ref_scores - cand_scores)),
+    }
+
+
+DEFAULT_RESUME_CORPUS = [
+    "Developed data pipelines in Python and SQL for a cloud analytics team",
+    "Managed a team of five software engineers over three years",
+    "Designed and deployed services on AWS",
+    "Led the migration of a Java monolith to microservices",
+    "Bachelor of Science in Computer Science",
+]
+DEFAULT_JOB_CORPUS = [
+    "Experience with Python and SQL is required",
+    "You will lead a small engineering team",
+    "Hands-on experience with AWS cloud infrastructure",
+    "Strong Java skills",
+]
+
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Report score drift of an inference backend against torch fp32")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--backend", choices=BACKENDS[1:], default="int8")
+    parser.add_argument("--corpus", help="JSON file with {\"resumes\": [...], \"jobs\": [...]}")
+    parser.add_argument("--standin", action="store_true", help="Use a tiny locally built model")
+    args = parser.parse_args()
+
+    resumes, jobs = DEFAULT_RESUME_CORPUS, DEFAULT_JOB_CORPUS
+    if args.corpus:
+        with open(args.corpus, "r", encoding="utf-8") as corpus_file:
+            corpus = json.load(corpus_file)
+        resumes, jobs = corpus["resumes"], corpus["jobs"]
+
+    try:
+        model_name = args.model
+        if args.standin:
+            model_name = os.path.join(tempfile.mkdtemp(prefix="standin-"), "model")
+            build_standin_model(model_name)
+        reference = load_backend(model_name, "torch")
+        candidate = load_backend(model_name, args.backend)
+        print(json.dumps(check_parity(reference, candidate, resumes, jobs), indent=2))
+    except Exception as e:
+        logger.error(f"Error checking backend parity: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise
@@ -0,0 +1,235 @@
+import hashlib
+import logging
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .scheduler import InferenceScheduler
+from .shared_files import file_lock, read_appended_lines
+from ..metrics import ENCODE_CALL_SENTENCES, stage_timer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_SIZE", "50000"))
+DEFAULT_DISK_CAPACITY = int(os.getenv("EMBEDDING_CACHE_DISK_CAPACITY", "1000000"))
+
+
+def normalize_sentence(sentence: str) -> str:
+    """Normalize unicode and whitespace so trivially different sentences share a key."""
+    return " ".join(unicodedata.normalize("NFC", sentence).split())
+
+
+def cache_key(model_name: str, sentence: str) -> str:
+    """Content-addressed key for a sentence embedded by a given model."""
+    digest = hashlib.sha1(normalize_sentence(sentence).encode("utf-8")).hexdigest()
+    return f"{model_name}:{digest}"
+
+
+class DiskTier:
+    """Append-only memory-mapped embedding store for a single model.
+
+    Vectors live in a fixed-capacity ``.npy`` memmap and rows are located
+    through a tab separated ``key -> row`` log that is replayed on startup.
+    Pre-fork workers may share the directory: writers hold the ``.lock`` file
+    and first read rows other workers appended, and ``refresh`` picks those
+    rows up before lookups.
+    """
+    def __init__(self, directory: str, model_name: str, capacity: int):
+        self.directory = directory
+        self.capacity = capacity
+        slug = model_name.replace("/", "__")
+        self.vectors_path = os.path.join(directory, f"{slug}.npy")
+        self.index_path = os.path.join(directory, f"{slug}.idx")
+        self.lock_path = os.path.join(directory, f"{slug}.lock")
+        self.rows: Dict[str, int] = {}
+        self.next_row = 0
+        self.vectors = None
+        self._index_offset = 0
+        os.makedirs(directory, exist_ok=True)
+        self.refresh()
+
+    def refresh(self):
+        """Map the vectors once they exist and replay index lines appended since the last call."""
+        if self.vectors is None:
+            if not os.path.exists(self.vectors_path):
+                return
+            self.vectors = np.load(self.vectors_path, mmap_mode="r+")
+            self.capacity = self.vectors.shape[0]
+        lines, self._index_offset = read_appended_lines(self.index_path, self._index_offset)
+        for line in lines:
+            parts = line.split("\t")
+            if len(parts) == 2 and parts[1].isdigit():
+                row = int(parts[1])
+                self.rows.setdefault(parts[0], row)
+                self.next_row = max(self.next_row, row + 1)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        row = self.rows.get(key)
+        if row is None:
+            return None
+        return np.array(self.vectors[row])
+
+    def put_many(self, keys: List[str], vectors: np.ndarray):
+        with file_lock(self.lock_path):
+            self.refresh()
+            if self.vectors is None:
+                # First writer for this model, and no other process can be creating it now
+                self.vectors = np.lib.format.open_memmap(
+                    self.vectors_path, mode="w+", dtype=np.float32,
+                    shape=(self.capacity, vectors.shape[1])
+                )
+            lines = []
+            for key, vector in zip(keys, vectors):
+                if key in self.rows:
+                    continue
+                row = self.next_row
+                if row >= self.capacity:
+                    break
+                self.vectors[row] = vector
+                self.rows[key] = row
+                self.next_row = row + 1
+                lines.append(f"{key}\t{row}\n")
+            if lines:
+                # Flush vectors before the index so an index row never points at garbage
+                self.vectors.flush()
+                with open(self.index_path, "a", encoding="utf-8") as index_file:
+                    index_file.writelines(lines)
+                self._index_offset = os.path.getsize(self.index_path)
+
+
+class EmbeddingCache:
+    """Sentence embedding cache with an LRU memory tier and optional disk tier."""
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, disk_dir: Optional[str] = None,
+                 disk_capacity: int = DEFAULT_DISK_CAPACITY):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_capacity = disk_capacity
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._disk: Dict[str, DiskTier] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _disk_tier(self, model_name: str) -> Optional[DiskTier]:
+        if not self.disk_dir:
+            return None
+        tier = self._disk.get(model_name)
+        if tier is None:
+            tier = DiskTier(self.disk_dir, model_name, self.disk_capacity)
+            self._disk[model_name] = tier
+        return tier
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def lookup(self, model_name: str, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Return cached vectors for the given keys, promoting disk hits to memory."""
+        found = {}
+        with self._lock:
+            disk = self._disk_tier(model_name)
+            if disk is not None:
+                # Rows other workers appended since the last lookup
+                disk.refresh()
+            for key in keys:
+                if key in found:
+                    continue
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                elif disk is not None:
+                    vector = disk.get(key)
+                    if vector is not None:
+                        self._remember(key, vector)
+                        self.disk_hits += 1
+                if vector is not None:
+                    found[key] = vector
+        return found
+
+    def store(self, model_name: str, keys: List[str], vectors: np.ndarray):
+        """Insert freshly encoded vectors into every tier."""
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                # A row view would keep the whole encoded batch alive for as long as any one entry
+                self._remember(key, vector.copy())
+            disk = self._disk_tier(model_name)
+            if disk is not None:
+                try:
+                    disk.put_many(keys, vectors)
+                except OSError as e:
+                    logger.error(f"Error writing embedding cache to disk: {str(e)}")
+
+    def encode(self, model, model_name: str, sentences: List[str], convert_to_tensor: bool = False):
+        """Encode sentences, sending only cache misses to the model in one batch."""
+        with stage_timer("encode", sentences=len(sentences)) as span_args:
+            keys = [cache_key(model_name, s) for s in sentences]
+            found = self.lookup(model_name, keys)
+
+            missing_keys = []
+            missing_sentences = []
+            seen = set(found)
+            for key, sentence in zip(keys, sentences):
+                if key not in seen:
+                    seen.add(key)
+                    missing_keys.append(key)
+                    missing_sentences.append(sentence)
+            span_args["cache_misses"] = len(missing_sentences)
+
+            if missing_sentences:
+                with self._lock:
+                    self.misses += len(missing_sentences)
+                encoded = model.encode(missing_sentences, convert_to_numpy=True)
+                # The micro-batching scheduler records the forward batches it forms itself
+                if not isinstance(model, InferenceScheduler):
+                    ENCODE_CALL_SENTENCES.observe(len(missing_sentences))
+                encoded = np.asarray(encoded, dtype=np.float32)
+                self.store(model_name, missing_keys, encoded)
+                found.update(zip(missing_keys, encoded))
+
+            if sentences:
+                embeddings = np.stack([found[key] for key in keys])
+            else:
+                embeddings = np.empty((0, 0), dtype=np.float32)
+
+        if convert_to_tensor:
+            import torch
+            return torch.from_numpy(embeddings)
+        return embeddings
+
+    def stats(self) -> Dict:
+        """Hit/miss counters used to size the cache."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "disk_entries": sum(len(tier.rows) for tier in self._disk.values()),
+            }
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process wide cache configured from EMBEDDING_CACHE_* environment variables."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache(disk_dir=os.getenv("EMBEDDING_CACHE_DIR") or None)
+    return _cache
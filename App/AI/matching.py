@@ -0,0 +1,145 @@
+from typing import TYPE_CHECKING, List, NamedTuple, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    import torch
+
+# Requirement buckets by best sentence similarity: strong > 0.6, moderate 0.4-0.6, gap < 0.4
+STRONG_MATCH = 0.6
+MODERATE_MATCH = 0.4
+
+
+class BatchMatch(NamedTuple):
+    """Similarity data for B (resume, job) pairs, padded to the longest of each side.
+
+    Padded resume rows and job columns hold -inf in ``similarity`` and
+    ``top_scores``; ``resume_mask``/``job_mask`` mark the real sentences. A
+    requirement is only bucketed when its pair has resume sentences.
+    """
+    similarity: "torch.Tensor"    # [B, R, J]
+    resume_mask: "torch.Tensor"   # [B, R]
+    job_mask: "torch.Tensor"      # [B, J]
+    best_scores: "torch.Tensor"   # [B, J] best resume sentence per requirement
+    best_indices: "torch.Tensor"  # [B, J]
+    top_scores: "torch.Tensor"    # [B, J, k] descending
+    top_indices: "torch.Tensor"   # [B, J, k]
+    strong: "torch.Tensor"        # [B, J]
+    moderate: "torch.Tensor"      # [B, J]
+    gaps: "torch.Tensor"          # [B, J]
+    match_scores: "torch.Tensor"  # [B] 0-100, mean best similarity of the scored requirements
+
+
+def pad_embeddings(embeddings: Sequence["torch.Tensor"], dim: int) -> Tuple["torch.Tensor", "torch.Tensor"]:
+    """Stack ragged [n_i, dim] tensors into [B, max n_i, dim] plus a [B, max n_i] validity mask."""
+    import torch
+
+    lengths = torch.tensor([len(e) for e in embeddings], dtype=torch.long)
+    padded = torch.nn.utils.rnn.pad_sequence(
+        [e.reshape(-1, dim).float() for e in embeddings], batch_first=True
+    )
+    mask = torch.arange(padded.shape[1])[None, :] < lengths[:, None]
+    return padded, mask
+
+
+def empty_match(batch: int) -> BatchMatch:
+    """Match of ``batch`` pairs with no sentences on either side: score 0 and empty buckets."""
+    import torch
+
+    empty = torch.empty((batch, 0))
+    none = torch.zeros((batch, 0), dtype=torch.bool)
+    return BatchMatch(
+        similarity=torch.empty((batch, 0, 0)),
+        resume_mask=none,
+        job_mask=none,
+        best_scores=empty,
+        best_indices=torch.zeros((batch, 0), dtype=torch.long),
+        top_scores=torch.empty((batch, 0, 0)),
+        top_indices=torch.empty((batch, 0, 0), dtype=torch.long),
+        strong=none,
+        moderate=none,
+        gaps=none,
+        match_scores=torch.zeros(batch, dtype=torch.long),
+    )
+
+
+def match_batch(resume_embeddings: Sequence["torch.Tensor"],
+                job_embeddings: Union["torch.Tensor", Sequence["torch.Tensor"]],
+                top_k: int = 3, strong: float = STRONG_MATCH,
+                moderate: float = MODERATE_MATCH) -> BatchMatch:
+    """Score many (resume, job) pairs with one batched matmul.
+
+    ``resume_embeddings`` holds one [n_i, D] sentence embedding tensor per
+    pair. ``job_embeddings`` is either one [J, D] tensor shared by every
+    pair (ranking resumes against a single job) or one tensor per pair.
+    Embeddings are L2-normalized here, so similarities are cosines.
+    """
+    import torch
+    import torch.nn.functional as F
+
+    lengths = [len(e) for e in resume_embeddings]
+    shared_job = isinstance(job_embeddings, torch.Tensor)
+    # Encoding no sentences gives a (0, 0) array, so take the dimension from the non-empty inputs
+    dim = max((e.shape[-1] for e in list(resume_embeddings) + ([job_embeddings] if shared_job else list(job_embeddings))
+               if e.numel()), default=0)
+    if dim == 0:
+        return empty_match(len(lengths))
+    if shared_job:
+        # Shared job: one [sum n_i, D] x [D, J] matmul, then pad the narrow similarity rows
+        jobs = F.normalize(job_embeddings.reshape(-1, dim).float(), dim=-1)
+        flat = torch.cat([e.reshape(-1, dim).float() for e in resume_embeddings])
+        rows = torch.matmul(F.normalize(flat, dim=-1), jobs.T)
+        similarity = torch.nn.utils.rnn.pad_sequence(
+            list(torch.split(rows, lengths)), batch_first=True, padding_value=float("-inf")
+        )
+        resume_mask = torch.arange(similarity.shape[1])[None, :] < torch.tensor(lengths)[:, None]
+        job_mask = torch.ones(len(lengths), jobs.shape[0], dtype=torch.bool)
+    else:
+        jobs, job_mask = pad_embeddings(job_embeddings, dim)
+        resumes, resume_mask = pad_embeddings(resume_embeddings, dim)
+        similarity = torch.matmul(F.normalize(resumes, dim=-1), F.normalize(jobs, dim=-1).transpose(1, 2))
+        valid = resume_mask[:, :, None] & job_mask[:, None, :]
+        similarity = similarity.masked_fill(~valid, float("-inf"))
+
+    batch, resume_len, job_len = similarity.shape
+    k = min(top_k, resume_len)
+    if resume_len:
+        best_scores, best_indices = similarity.max(dim=1)
+        top_scores, top_indices = similarity.topk(k, dim=1)
+        top_scores, top_indices = top_scores.transpose(1, 2), top_indices.transpose(1, 2)
+    else:
+        best_scores = torch.full((batch, job_len), float("-inf"))
+        best_indices = torch.zeros((batch, job_len), dtype=torch.long)
+        top_scores = torch.empty((batch, job_len, 0))
+        top_indices = torch.empty((batch, job_len, 0), dtype=torch.long)
+
+    scored = job_mask & resume_mask.any(dim=1)[:, None]
+    counts = scored.sum(dim=1)
+    mean_best = best_scores.masked_fill(~scored, 0.0).sum(dim=1) / counts.clamp(min=1)
+    match_scores = torch.where(counts > 0, ((mean_best + 1) * 50).long(), torch.zeros_like(counts))
+
+    return BatchMatch(
+        similarity=similarity,
+        resume_mask=resume_mask,
+        job_mask=job_mask,
+        best_scores=best_scores,
+        best_indices=best_indices,
+        top_scores=top_scores,
+        top_indices=top_indices,
+        strong=scored & (best_scores > strong),
+        moderate=scored & (best_scores >= moderate) & (best_scores <= strong),
+        gaps=scored & (best_scores < moderate),
+        match_scores=match_scores,
+    )
+
+
+def bucket_matches(match: BatchMatch, index: int, bucket: "torch.Tensor", limit: int,
+                   descending: bool = True) -> List[Tuple[int, int, float]]:
+    """(requirement index, best resume sentence index, similarity) for one pair's bucket, sorted by similarity."""
+    import torch
+
+    requirements = bucket[index].nonzero().flatten()
+    scores = match.best_scores[index, requirements]
+    order = torch.sort(scores, descending=descending, stable=True).indices[:limit]
+    requirements = requirements[order]
+    return list(zip(
+        requirements.tolist(), match.best_indices[index, requirements].tolist(), scores[order].tolist()
+    ))
@@ -1,4 +1,163 @@
-from pdfminer.high_level import extract_text
+import asyncio
+import io
+import logging
+import os
+import threading
+import time
+from typing import Awaitable, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ENGINES = ("pypdf2", "pdfminer")
+# pypdf2 | pdfminer | auto (PyPDF2, falling back to pdfminer for documents it reads poorly)
+PDF_ENGINE = os.getenv("PDF_ENGINE", "auto")
+# pdfminer layout analysis is accurate but slow; off unless asked for
+PDF_LAYOUT_ANALYSIS = os.getenv("PDF_LAYOUT_ANALYSIS", "0") == "1"
+# Documents with at least this many pages are split into page ranges extracted in parallel
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "6"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "3"))
+# In auto mode, fewer characters per page than this means PyPDF2 missed the text layer
+AUTO_MIN_CHARS_PER_PAGE = 40
+
+_stats_lock = threading.Lock()
+_engine_stats: Dict[str, Dict[str, float]] = {
+    engine: {"documents": 0, "pages": 0, "seconds": 0.0} for engine in ENGINES
+}
+
 
 def parse_pdf(file_path):
-    return extract_text(file_path)
\ No newline at end of file
+    from pdfminer.high_level import extract_text
+    return extract_text(file_path)
+
+
+def open_source(source: Union[bytes, str]) -> BinaryIO:
+    """Open parser input given as in-memory bytes or as a file path."""
+    if isinstance(source, str):
+        return open(source, "rb")
+    return io.BytesIO(source)
+
+
+def pdf_page_count(source: Union[bytes, str]) -> int:
+    import PyPDF2
+    with open_source(source) as pdf_file:
+        return len(PyPDF2.PdfReader(pdf_file).pages)
+
+
+def _pages_pypdf2(source: Union[bytes, str], start: int, stop: int) -> List[str]:
+    import PyPDF2
+    with open_source(source) as pdf_file:
+        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        return [pdf_reader.pages[i].extract_text() or "" for i in range(start, min(stop, len(pdf_reader.pages)))]
+
+
+def _pages_pdfminer(source: Union[bytes, str], start: int, stop: int, layout: bool) -> List[str]:
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    output = io.StringIO()
+    manager = PDFResourceManager()
+    # laparams=None skips layout analysis and emits text in content stream order
+    converter = TextConverter(manager, output, laparams=LAParams() if layout else None)
+    interpreter = PDFPageInterpreter(manager, converter)
+    pages = []
+    with open_source(source) as pdf_file:
+        for page in PDFPage.get_pages(pdf_file, pagenos=set(range(start, stop))):
+            interpreter.process_page(page)
+            # TextConverter ends every page with a form feed
+            pages.append(output.getvalue().rstrip("\x0c"))
+            output.seek(0)
+            output.truncate(0)
+    converter.close()
+    return pages
+
+
+def extract_page_range(engine: str, source: Union[bytes, str], start: int, stop: int,
+                       layout: bool = PDF_LAYOUT_ANALYSIS) -> Tuple[List[str], float]:
+    """Extract pages [start, stop) with one engine; returns (page texts, seconds).
+
+    Top level so it can run in a worker process. Pass a file path as
+    ``source`` to let the worker read the document itself.
+    """
+    began = time.perf_counter()
+    if engine == "pypdf2":
+        pages = _pages_pypdf2(source, start, stop)
+    elif engine == "pdfminer":
+        pages = _pages_pdfminer(source, start, stop, layout)
+    else:
+        raise ValueError(f"Unknown PDF engine '{engine}', expected one of {ENGINES}")
+    return pages, time.perf_counter() - began
+
+
+def page_ranges(page_count: int, pages_per_task: int = PDF_PAGES_PER_TASK) -> List[Tuple[int, int]]:
+    if page_count < PDF_PARALLEL_MIN_PAGES:
+        return [(0, page_count)]
+    return [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+
+
+def _record(engine: str, pages: int, seconds: float):
+    with _stats_lock:
+        stats = _engine_stats[engine]
+        stats["documents"] += 1
+        stats["pages"] += pages
+        stats["seconds"] += seconds
+
+
+def _needs_fallback(pages: List[str]) -> bool:
+    return bool(pages) and sum(len(p.strip()) for p in pages) < AUTO_MIN_CHARS_PER_PAGE * len(pages)
+
+
+def extract_pdf_pages(source: Union[bytes, str], engine: Optional[str] = None) -> List[str]:
+    """Extract every page in this process with the configured engine."""
+    engine = engine or PDF_ENGINE
+    first = "pypdf2" if engine == "auto" else engine
+    pages, seconds = extract_page_range(first, source, 0, pdf_page_count(source))
+    _record(first, len(pages), seconds)
+    if engine == "auto" and _needs_fallback(pages):
+        pages, seconds = extract_page_range("pdfminer", source, 0, len(pages))
+        _record("pdfminer", len(pages), seconds)
+    return pages
+
+
+async def extract_pdf_pages_parallel(source: Union[bytes, str], submit: Callable[..., Awaitable],
+                                     engine: Optional[str] = None,
+                                     page_count: Optional[int] = None) -> List[str]:
+    """Extract pages, fanning page ranges of large documents out to worker processes.
+
+    ``submit(fn, *args)`` runs a call on a pool and returns an awaitable,
+    e.g. ``App.executors.run_parsing``. Page lists are concatenated once at
+    the end, in page order.
+    """
+    engine = engine or PDF_ENGINE
+    if page_count is None:
+        page_count = await submit(pdf_page_count, source)
+
+    async def run(selected: str) -> List[str]:
+        results = await asyncio.gather(*(
+            submit(extract_page_range, selected, source, start, stop)
+            for start, stop in page_ranges(page_count)
+        ))
+        pages = [page for chunk, _ in results for page in chunk]
+        _record(selected, len(pages), sum(seconds for _, seconds in results))
+        return pages
+
+    pages = await run("pypdf2" if engine == "auto" else engine)
+    if engine == "auto" and _needs_fallback(pages):
+        logger.info("PyPDF2 found little text, retrying with pdfminer")
+        pages = await run("pdfminer")
+    return pages
+
+
+def engine_stats() -> Dict:
+    """Documents, pages and CPU seconds spent per extraction engine."""
+    with _stats_lock:
+        return {
+            engine: {
+                **stats,
+                "seconds_per_page": stats["seconds"] / stats["pages"] if stats["pages"] else 0.0,
+            }
+            for engine, stats in _engine_stats.items()
+        }
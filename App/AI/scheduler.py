@@ -0,0 +1,150 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List
+
+import numpy as np
+
+from ..metrics import ENCODE_SENTENCES, ENCODE_TOKENS
+from ..tracing import current_trace
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "5"))
+
+
+class _EncodeRequest:
+    def __init__(self, sentences: List[str]):
+        self.sentences = sentences
+        self.future: Future = Future()
+        # Trace of the request that queued these sentences, if it is traced
+        self.trace = current_trace()
+
+
+class InferenceScheduler:
+    """Dynamic micro-batching front end for a SentenceTransformer.
+
+    Callers from any thread submit their own sentence lists. A single worker
+    thread gathers requests until ``max_batch_size`` sentences are queued or
+    ``max_wait_ms`` has passed since the first one arrived, sorts the combined
+    sentences by token length to minimise padding, encodes them in packed
+    batches and hands every caller back its own rows in the original order.
+
+    ``encode`` mirrors ``SentenceTransformer.encode`` closely enough to be
+    passed anywhere the model is (e.g. ``EmbeddingCache.encode``).
+    """
+    def __init__(self, model, max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[_EncodeRequest]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self._thread.start()
+        self.batches = 0
+        self.sentences = 0
+        self.requests = 0
+
+    def encode(self, sentences, convert_to_numpy: bool = True, convert_to_tensor: bool = False, **kwargs):
+        """Queue sentences for the next batch and wait for their embeddings."""
+        single = isinstance(sentences, str)
+        request = _EncodeRequest([sentences] if single else list(sentences))
+        if request.sentences:
+            self._queue.put(request)
+            embeddings = request.future.result()
+        else:
+            embeddings = np.empty((0, 0), dtype=np.float32)
+        if single:
+            embeddings = embeddings[0]
+        if convert_to_tensor:
+            import torch
+            return torch.from_numpy(embeddings)
+        return embeddings
+
+    def _token_lengths(self, sentences: List[str]) -> List[int]:
+        tokenizer = getattr(self.model, "tokenizer", None)
+        if tokenizer is None:
+            return [len(s.split()) for s in sentences]
+        return [len(ids) for ids in tokenizer(sentences, add_special_tokens=True)["input_ids"]]
+
+    def _collect(self) -> List[_EncodeRequest]:
+        """Block for one request, then gather more until the batch is full or the wait expires."""
+        pending = [self._queue.get()]
+        size = len(pending[0].sentences)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(request)
+            size += len(request.sentences)
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            try:
+                self._encode_pending(pending)
+            except Exception as e:
+                logger.error(f"Error in inference scheduler: {str(e)}")
+                for request in pending:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def _encode_pending(self, pending: List[_EncodeRequest]):
+        sentences = [s for request in pending for s in request.sentences]
+        lengths = self._token_lengths(sentences)
+        order = sorted(range(len(sentences)), key=lambda i: lengths[i])
+
+        traces = {id(request.trace): request.trace for request in pending if request.trace is not None}
+        embeddings = None
+        for start in range(0, len(order), self.max_batch_size):
+            chunk = order[start:start + self.max_batch_size]
+            tokens = sum(lengths[i] for i in chunk)
+            ENCODE_SENTENCES.observe(len(chunk))
+            ENCODE_TOKENS.observe(tokens)
+            started = time.monotonic()
+            encoded = np.asarray(self.model.encode(
+                [sentences[i] for i in chunk], batch_size=len(chunk), convert_to_numpy=True
+            ), dtype=np.float32)
+            # A batch can mix several requests; each traced one gets the whole forward pass
+            for trace in traces.values():
+                trace.add("model.encode", started, time.monotonic(), {
+                    "batch_sentences": len(chunk), "batch_tokens": tokens, "requests": len(pending)
+                })
+            if embeddings is None:
+                embeddings = np.empty((len(sentences), encoded.shape[1]), dtype=np.float32)
+            embeddings[chunk] = encoded
+            with self._lock:
+                self.batches += 1
+
+        offset = 0
+        for request in pending:
+            count = len(request.sentences)
+            request.future.set_result(embeddings[offset:offset + count])
+            offset += count
+        with self._lock:
+            self.requests += len(pending)
+            self.sentences += len(sentences)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "queued_requests": self._queue.qsize(),
+                "requests": self.requests,
+                "batches": self.batches,
+                "sentences": self.sentences,
+                "avg_batch_size": self.sentences / self.batches if self.batches else 0.0,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+            }
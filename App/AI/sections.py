@@ -0,0 +1,93 @@
+import re
+from typing import List, NamedTuple
+
+# Canonical section name for each group of the header alternation
+SECTION_NAMES = {
+    "summary": "Professional Summary",
+    "experience": "Professional Experience",
+    "education": "Education",
+    "skills": "Skills",
+    "projects": "Projects",
+    "achievements": "Achievements",
+    "contact": "Contact Information",
+}
+
+# One alternation over every header keyword; the matching group names the section
+HEADER_KEYWORDS = re.compile(
+    r"\b(?:"
+    r"(?P<summary>professional summary|summary|profile)"
+    r"|(?P<experience>experience|work history|employment)"
+    r"|(?P<education>education|academic)"
+    r"|(?P<skills>skills|technical skills|core competencies)"
+    r"|(?P<projects>projects|key projects)"
+    r"|(?P<achievements>achievements|accomplishments)"
+    r"|(?P<contact>contact|personal information)"
+    r")\b",
+    re.IGNORECASE,
+)
+
+# Header lines are short: "SKILLS", "Work Experience:", "Technical Skills & Tools"
+MAX_HEADER_CHARS = 48
+MAX_HEADER_WORDS = 5
+# Lowercase words allowed inside a Title Case header
+HEADER_CONNECTORS = {"&", "and", "of", "or", "the", "/", "-", "|"}
+BULLET_CHARS = "#*-•·>|"
+
+# A line short enough to be a header, or the short label of an inline "Skills: ..." header.
+# Cheaply rejects body text so the keyword alternation only runs on candidate labels.
+HEADER_CANDIDATE = re.compile(
+    r"^[^\S\n]*(?P<label>[^\n:]{1,%d})(?:(?P<colon>:)|$)" % MAX_HEADER_CHARS,
+    re.MULTILINE,
+)
+
+
+class SectionSpan(NamedTuple):
+    """A section located in the original text.
+
+    ``body_start``/``body_end`` delimit its content; ``header_start`` is
+    where the header line (or inline header, e.g. "Skills:") begins.
+    """
+    name: str
+    header_start: int
+    body_start: int
+    body_end: int
+
+
+def looks_like_header(label: str) -> bool:
+    """Shape check for a header candidate (the line, or the text before its first colon)."""
+    label = label.strip().lstrip(BULLET_CHARS).strip()
+    if not label or len(label) > MAX_HEADER_CHARS or label.endswith((".", ",", ";")):
+        return False
+    words = label.split()
+    if len(words) > MAX_HEADER_WORDS:
+        return False
+    if label.isupper():
+        return True
+    return all(word[0].isupper() or not word[0].isalpha() or word.lower() in HEADER_CONNECTORS
+               for word in words)
+
+
+def segment_sections(text: str) -> List[SectionSpan]:
+    """Locate section headers in a single scan of ``text``.
+
+    Lines are first filtered by shape, then the keyword alternation is run
+    on the candidate label only. Returns spans in document order, each
+    running to the start of the next header.
+    """
+    headers = []
+    for candidate in HEADER_CANDIDATE.finditer(text):
+        label_start, label_end = candidate.span("label")
+        keyword = HEADER_KEYWORDS.search(text, label_start, label_end)
+        if keyword is None or not looks_like_header(candidate.group("label")):
+            continue
+        if candidate.group("colon"):
+            body_start = candidate.end()
+        else:
+            body_start = label_end
+        headers.append((SECTION_NAMES[keyword.lastgroup], candidate.start(), body_start))
+
+    spans = []
+    for index, (name, header_start, body_start) in enumerate(headers):
+        body_end = headers[index + 1][1] if index + 1 < len(headers) else len(text)
+        spans.append(SectionSpan(name, header_start, body_start, body_end))
+    return spans
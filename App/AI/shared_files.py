@@ -0,0 +1,49 @@
+"""Helpers for on-disk stores shared by several worker processes.
+
+Pre-fork workers each hold their own copy of a store's index, so writers
+take an exclusive ``flock`` on the store's lock file and catch up on index
+lines other processes appended before assigning new rows.
+"""
+import fcntl
+import os
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """Exclusive advisory lock held across processes (and threads) using ``path``."""
+    with open(path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def read_appended_lines(path: str, offset: int) -> Tuple[List[str], int]:
+    """Complete lines appended to ``path`` since byte ``offset``, and the new offset.
+
+    A trailing line without its newline is still being written and is left
+    for the next call.
+    """
+    try:
+        if os.path.getsize(path) <= offset:
+            return [], offset
+    except OSError:
+        return [], offset
+    with open(path, "rb") as appended_file:
+        appended_file.seek(offset)
+        data = appended_file.read()
+    end = data.rfind(b"\n") + 1
+    return data[:end].decode("utf-8").splitlines(), offset + end
+
+
+def ensure_file_size(path: str, size: int):
+    """Create ``path`` as a sparse file of at least ``size`` bytes without truncating existing data."""
+    descriptor = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if os.fstat(descriptor).st_size < size:
+            os.ftruncate(descriptor, size)
+    finally:
+        os.close(descriptor)
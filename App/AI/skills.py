@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import threading
+import traceback
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SKILLS_TAXONOMY_PATH = os.getenv(
+    "SKILLS_TAXONOMY_PATH", os.path.join(os.path.dirname(__file__), "skills_taxonomy.json")
+)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace so aliases match across casing and line breaks."""
+    return " ".join(text.lower().split())
+
+
+class SkillMatcher:
+    """Aho-Corasick automaton over every alias in the skills taxonomy.
+
+    Aliases are normalized like the input text and map to a canonical skill
+    name ("js" -> "JavaScript"). ``find`` scans the text once regardless of
+    taxonomy size and only accepts matches bounded by non-alphanumeric
+    characters, so "Java" is not found inside "JavaScript".
+    """
+    def __init__(self, aliases: Dict[str, str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # (alias length, canonical name) for every alias ending at a state
+        self.output: List[List[Tuple[int, str]]] = [[]]
+        for alias, canonical in aliases.items():
+            self._add(alias, canonical)
+        self._link()
+        self.skills = set(aliases.values())
+
+    def _add(self, alias: str, canonical: str):
+        state = 0
+        for char in alias:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append((len(alias), canonical))
+
+    def _link(self):
+        # Breadth first so each state's failure target is final before its children use it
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find(self, text: str) -> List[Tuple[int, int, str]]:
+        """Leftmost-longest, non-overlapping (start, end, skill) matches in normalized text."""
+        text = normalize_text(text)
+        goto, fail, output = self.goto, self.fail, self.output
+        matches = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not output[state]:
+                continue
+            end = index + 1
+            if end < len(text) and text[end].isalnum():
+                continue
+            for length, skill in output[state]:
+                start = end - length
+                if start == 0 or not text[start - 1].isalnum():
+                    matches.append((start, end, skill))
+
+        matches.sort(key=lambda match: (match[0], match[0] - match[1]))
+        selected = []
+        last_end = 0
+        for start, end, skill in matches:
+            if start >= last_end:
+                selected.append((start, end, skill))
+                last_end = end
+        return selected
+
+    def extract(self, text: str) -> Set[str]:
+        return {skill for _, _, skill in self.find(text)}
+
+
+def load_taxonomy(path: str = SKILLS_TAXONOMY_PATH) -> Dict[str, str]:
+    """Read the taxonomy file into a normalized alias -> canonical skill mapping.
+
+    Canonical names match themselves unless listed under "ambiguous"
+    (e.g. "Go", which is only matched through aliases such as "golang").
+    """
+    with open(path, "r", encoding="utf-8") as taxonomy_file:
+        taxonomy = json.load(taxonomy_file)
+    ambiguous = set(taxonomy.get("ambiguous", []))
+    aliases = {}
+    for category in taxonomy["skills"].values():
+        for canonical, synonyms in category.items():
+            names = list(synonyms) if canonical in ambiguous else [canonical] + list(synonyms)
+            for name in names:
+                aliases[normalize_text(name)] = canonical
+    return aliases
+
+
+_matcher: Optional[SkillMatcher] = None
+_matcher_failed = False
+_matcher_lock = threading.Lock()
+
+
+def get_skill_matcher() -> Optional[SkillMatcher]:
+    """Process wide matcher compiled from SKILLS_TAXONOMY_PATH; None if the taxonomy cannot be loaded."""
+    global _matcher, _matcher_failed
+    if _matcher is None and not _matcher_failed:
+        with _matcher_lock:
+            if _matcher is None and not _matcher_failed:
+                try:
+                    _matcher = SkillMatcher(load_taxonomy())
+                    logger.info(f"Compiled {len(_matcher.skills)} skills into {len(_matcher.goto)} automaton states")
+                except Exception as e:
+                    logger.error(f"Error loading skills taxonomy {SKILLS_TAXONOMY_PATH}: {str(e)}")
+                    logger.error(traceback.format_exc())
+                    _matcher_failed = True
+    return _matcher
+
+
+def skill_coverage(resume_skills: Set[str], job_skills: Set[str]) -> Dict:
+    """Required vs present skills, computed from sets."""
+    present = resume_skills & job_skills
+    missing = job_skills - resume_skills
+    return {
+        "required": sorted(job_skills),
+        "present": sorted(present),
+        "missing": sorted(missing),
+        "additional": sorted(resume_skills - job_skills),
+        "coverage": len(present) / len(job_skills) if job_skills else 1.0,
+    }
@@ -1,39 +1,66 @@
 import warnings
 warnings.filterwarnings("ignore", category=UserWarning, module="transformers.utils.generic")
 
-from sentence_transformers import SentenceTransformer, util
 import numpy as np
-import torch
 import logging
 import traceback
 import re
 from collections import defaultdict
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 import textwrap
 import gc
+import os
+import threading
+from .embedding_cache import get_embedding_cache
+from .scheduler import InferenceScheduler
+from .backends import load_backend
+from .sections import segment_sections
+from .skills import get_skill_matcher, skill_coverage
+from .matching import BatchMatch, match_batch
+from ..metrics import stage_timer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Initialize model as None
+MODEL_NAME = 'all-MiniLM-L6-v2'
 model = None
 
+# Micro-batch sentences from concurrent requests into shared forward passes
+MICRO_BATCHING = os.getenv("MICRO_BATCHING", "1") == "1"
+scheduler = None
+_scheduler_lock = threading.Lock()
+
+def intra_op_threads() -> int:
+    """Torch intra-op threads for this process; the pre-fork server sets it per worker."""
+    return int(os.getenv("TORCH_NUM_THREADS", "1"))
+
+def _reset_scheduler_after_fork():
+    # The scheduler's worker thread does not survive fork; forked workers start their own
+    global scheduler, _scheduler_lock
+    scheduler = None
+    _scheduler_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_scheduler_after_fork)
+
 def load_model():
     global model
     if model is None:
         try:
+            # torch is imported here rather than at module import to keep cold starts fast
+            import torch
             logger.info("Loading the pre-trained model...")
             # Force CPU usage and limit memory
-            torch.set_num_threads(1)
+            torch.set_num_threads(intra_op_threads())
             torch.set_num_interop_threads(1)
             
             # Clear any existing CUDA cache
             if torch.cuda.is_available():
                 torch.cuda.empty_cache()
             
-            # Use the smaller model
-            model = SentenceTransformer('all-MiniLM-L6-v2', device='cpu')
+            # Use the smaller model, on the backend selected by INFERENCE_BACKEND
+            model = load_backend(MODEL_NAME, device='cpu')
             
             # Force garbage collection
             gc.collect()
@@ -43,68 +70,77 @@ def load_model():
             logger.error(f"Error loading model: {str(e)}")
             logger.error(traceback.format_exc())
             raise
+    return model
+
+def get_encoder():
+    """Return the object requests should call ``encode`` on.
+
+    With MICRO_BATCHING enabled this is the shared InferenceScheduler in front
+    of the model, otherwise the model itself.
+    """
+    global scheduler
+    load_model()
+    if not MICRO_BATCHING:
+        return model
+    if scheduler is None:
+        with _scheduler_lock:
+            if scheduler is None:
+                scheduler = InferenceScheduler(model)
+    return scheduler
 
 def cleanup_memory():
     """Helper function to clean up memory"""
+    import torch
     gc.collect()
     if torch.cuda.is_available():
         torch.cuda.empty_cache()
-    torch.set_num_threads(1)
-    torch.set_num_interop_threads(1)
+    # Interop threads can only be configured once per process (see load_model)
+    torch.set_num_threads(intra_op_threads())
 
 class ResumeSection:
-    def __init__(self, name: str, content: List[str], order: int):
+    """A section of a resume, stored as offsets into the original text."""
+    def __init__(self, name: str, text: str, start: int, end: int, order: int):
         self.name = name
-        self.content = content
+        self.text = text
+        self.start = start
+        self.end = end
         self.order = order
 
+    @property
+    def content(self) -> List[str]:
+        """Non-empty, stripped lines of the section body."""
+        return [line.strip() for line in self.text[self.start:self.end].split('\n') if line.strip()]
+
+    def has_content(self) -> bool:
+        return bool(self.text[self.start:self.end].strip())
+
 def extract_sections(text: str) -> Dict[str, ResumeSection]:
+    """Split a resume into canonical sections in one pass (see sections.segment_sections)."""
     sections = {}
-    current_section = "other"
-    current_content = []
     order = 0
+    spans = segment_sections(text)
+    if not spans:
+        # No recognisable headers: everything is "other"
+        section = ResumeSection("other", text, 0, len(text), order)
+        return {"other": section} if section.has_content() else {}
     
-    # Common section headers with their canonical names
-    section_headers = {
-        r'professional summary|summary|profile': 'Professional Summary',
-        r'experience|work history|employment': 'Professional Experience',
-        r'education|academic': 'Education',
-        r'skills|technical skills|core competencies': 'Skills',
-        r'projects|key projects': 'Projects',
-        r'achievements|accomplishments': 'Achievements',
-        r'contact|personal information': 'Contact Information'
-    }
-    
-    lines = text.split('\n')
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Check if this line is a section header
-        is_header = False
-        for pattern, section_name in section_headers.items():
-            if re.search(pattern, line.lower()):
-                # Save previous section if it exists
-                if current_section != "other" and current_content:
-                    sections[current_section] = ResumeSection(current_section, current_content, order)
-                    order += 1
-                current_section = section_name
-                current_content = []
-                is_header = True
-                break
-                
-        if not is_header:
-            current_content.append(line)
-    
-    # Save the last section
-    if current_content:
-        sections[current_section] = ResumeSection(current_section, current_content, order)
+    for span in spans:
+        section = ResumeSection(span.name, text, span.body_start, span.body_end, order)
+        if section.has_content():
+            sections[span.name] = section
+            order += 1
     
     return sections
 
 def extract_skills(text: str) -> Set[str]:
-    """Extract skills from text."""
+    """Extract canonical skill names from text with the taxonomy matcher."""
+    matcher = get_skill_matcher()
+    if matcher is None:
+        return extract_skills_regex(text)
+    return matcher.extract(text)
+
+def extract_skills_regex(text: str) -> Set[str]:
+    """Pattern based skill extraction, used when the skills taxonomy is unavailable."""
     skills = set()
     
     # Enhanced skill patterns with better context
@@ -148,8 +184,51 @@ def extract_experience(text: str) -> List[str]:
     
     return experience
 
-def enhance_resume(resume_text: str, job_description: str) -> Dict:
-    """Analyze resume against job description and provide dynamic suggestions."""
+def split_sentences(text: str) -> List[str]:
+    """Split text into non-empty sentences."""
+    return [s.strip() for s in re.split(r'[.!?]', text) if s.strip()]
+
+def score_similarity(resume_sentences: List[str], job_sentences: List[str],
+                     match: BatchMatch, index: int = 0) -> Dict:
+    """Turn pair ``index`` of a batched match into relevant sentences and a match score."""
+    # Top 3 resume sentences per job requirement, read back in one transfer
+    top_scores = match.top_scores[index].tolist()
+    top_indices = match.top_indices[index].tolist()
+    relevant_sentences = [
+        {
+            'resume_sentence': resume_sentences[idx],
+            'job_requirement': job_sent,
+            'similarity': score
+        }
+        for job_sent, scores, indices in zip(job_sentences, top_scores, top_indices)
+        for score, idx in zip(scores, indices)
+        if score > 0.3  # Only include if similarity is meaningful
+    ]
+    match_score = int(match.match_scores[index])
+    
+    return {
+        "relevant_sentences": relevant_sentences,
+        "match_score": match_score
+    }
+
+def format_analysis(match_score: int, coverage: Optional[Dict] = None) -> str:
+    """Render the textual analysis returned to the client."""
+    output = []
+    output.append("Resume Analysis Results")
+    output.append("=" * 20)
+    output.append(f"Overall Match Score: {match_score}/100")
+    if coverage and coverage["required"]:
+        output.append(f"Skills Covered: {len(coverage['present'])}/{len(coverage['required'])}")
+        if coverage["missing"]:
+            output.append(f"Missing Skills: {', '.join(coverage['missing'])}")
+    return "\n".join(output)
+
+def enhance_resume(resume_text: str, job_description: str,
+                   resume_sentences: Optional[List[str]] = None) -> Dict:
+    """Analyze resume against job description and provide dynamic suggestions.
+
+    ``resume_sentences`` may be passed in when the segmentation is already cached.
+    """
     try:
         # Ensure model is loaded
         load_model()
@@ -157,52 +236,135 @@ def enhance_resume(resume_text: str, job_description: str) -> Dict:
         logger.info("Starting resume analysis...")
         
         # Split text into sentences
-        resume_sentences = [s.strip() for s in re.split(r'[.!?]', resume_text) if s.strip()]
-        job_sentences = [s.strip() for s in re.split(r'[.!?]', job_description) if s.strip()]
-        
-        # Get embeddings for all sentences
-        resume_embeddings = model.encode(resume_sentences, convert_to_tensor=True)
-        job_embeddings = model.encode(job_sentences, convert_to_tensor=True)
-        
-        # Calculate similarity matrix
-        similarity_matrix = util.pytorch_cos_sim(resume_embeddings, job_embeddings)
+        with stage_timer("sentence_split"):
+            if resume_sentences is None:
+                resume_sentences = split_sentences(resume_text)
+            job_sentences = split_sentences(job_description)
         
-        # Find most relevant resume sentences for each job requirement
-        relevant_sentences = []
-        for i, job_sent in enumerate(job_sentences):
-            similarities = similarity_matrix[:, i]
-            top_indices = torch.topk(similarities, min(3, len(resume_sentences))).indices
-            for idx in top_indices:
-                if similarities[idx] > 0.3:  # Only include if similarity is meaningful
-                    relevant_sentences.append({
-                        'resume_sentence': resume_sentences[idx],
-                        'job_requirement': job_sent,
-                        'similarity': similarities[idx].item()
-                    })
+        # Get embeddings for all sentences in one batch, reusing cached sentences
+        embeddings = get_embedding_cache().encode(
+            get_encoder(), MODEL_NAME, resume_sentences + job_sentences, convert_to_tensor=True
+        )
+        resume_embeddings = embeddings[:len(resume_sentences)]
+        job_embeddings = embeddings[len(resume_sentences):]
         
-        # Calculate overall match score
-        max_similarities = torch.max(similarity_matrix, dim=0)[0]
-        match_score = int((torch.mean(max_similarities).item() + 1) * 50)
-        
-        # Generate dynamic analysis
-        output = []
-        output.append("Resume Analysis Results")
-        output.append("=" * 20)
-        output.append(f"Overall Match Score: {match_score}/100")
+        result = analysis_result(resume_text, resume_sentences, resume_embeddings,
+                                 job_description, job_sentences, job_embeddings)
         
         # Clean up memory after processing
         cleanup_memory()
         
-        return {
-            "analysis": "\n".join(output),
-            "match_score": match_score
-        }
+        return result
     except Exception as e:
         logger.error(f"Error in enhance_resume: {str(e)}")
         logger.error(traceback.format_exc())
         cleanup_memory()
         raise
 
+def analysis_result(resume_text: str, resume_sentences: List[str], resume_embeddings,
+                    job_description: str, job_sentences: List[str], job_embeddings) -> Dict:
+    """Score encoded resume and job sentences and build the analysis response."""
+    import torch
+    # Calculate similarities, top matches and the score in one kernel call
+    with stage_timer("similarity"):
+        match = match_batch([torch.as_tensor(resume_embeddings)], job_embeddings)
+        scores = score_similarity(resume_sentences, job_sentences, match)
+    match_score = scores["match_score"]
+    
+    with stage_timer("formatting"):
+        # Required vs present skills come from exact taxonomy matches, not embeddings
+        coverage = skill_coverage(extract_skills(resume_text), extract_skills(job_description))
+        analysis = format_analysis(match_score, coverage)
+        document = format_resume(resume_text)
+    
+    return {
+        "analysis": analysis,
+        "match_score": match_score,
+        "skill_coverage": coverage,
+        "resume_document": document
+    }
+
+def encode_for_storage(sentences: List[str]) -> np.ndarray:
+    """Normalized float16 sentence embeddings, compact enough to store with a resume."""
+    load_model()
+    if not sentences:
+        return np.empty((0, 0), dtype=np.float16)
+    embeddings = np.asarray(get_embedding_cache().encode(get_encoder(), MODEL_NAME, sentences), dtype=np.float32)
+    embeddings = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    return embeddings.astype(np.float16)
+
+def rescore_resume(resume_text: str, resume_sentences: List[str], resume_embeddings: np.ndarray,
+                   job_description: str) -> Dict:
+    """Analyze a stored resume against a new job; only the job sentences are encoded."""
+    import torch
+    try:
+        load_model()
+        job_sentences = split_sentences(job_description)
+        job_embeddings = get_embedding_cache().encode(get_encoder(), MODEL_NAME, job_sentences, convert_to_tensor=True)
+        resume_embeddings = torch.from_numpy(resume_embeddings.astype(np.float32))
+        return analysis_result(resume_text, resume_sentences, resume_embeddings,
+                               job_description, job_sentences, job_embeddings)
+    except Exception as e:
+        logger.error(f"Error in rescore_resume: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise
+
+def embed_document(text: str) -> np.ndarray:
+    """Single normalized vector for a document: the mean of its sentence embeddings."""
+    sentences = split_sentences(text) or [text]
+    embeddings = get_embedding_cache().encode(get_encoder(), MODEL_NAME, sentences)
+    embeddings = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    vector = embeddings.mean(axis=0)
+    return vector / max(np.linalg.norm(vector), 1e-12)
+
+def rank_resumes(resumes: Iterable[Tuple[str, str]], job_description: str,
+                 batch_size: int = 32) -> Iterator[Dict]:
+    """Score many (name, resume_text) pairs against one job description.
+
+    The job description is encoded once. Resumes are encoded in batches of
+    ``batch_size`` documents and a result is yielded as soon as its batch is scored.
+    """
+    import torch
+    encoder = get_encoder()
+    cache = get_embedding_cache()
+    
+    job_sentences = split_sentences(job_description)
+    job_embeddings = cache.encode(encoder, MODEL_NAME, job_sentences, convert_to_tensor=True)
+    
+    def score_batch(batch: List[Tuple[str, List[str]]]) -> Iterator[Dict]:
+        sentences = [sentence for _, resume_sentences in batch for sentence in resume_sentences]
+        embeddings = cache.encode(encoder, MODEL_NAME, sentences, convert_to_tensor=True)
+        # Every pair in the batch is scored by one padded matmul against the shared job embeddings
+        with stage_timer("similarity"):
+            match = match_batch(
+                torch.split(embeddings, [len(resume_sentences) for _, resume_sentences in batch]), job_embeddings
+            )
+        for index, (name, resume_sentences) in enumerate(batch):
+            scores = score_similarity(resume_sentences, job_sentences, match, index)
+            yield {
+                "filename": name,
+                "match_score": scores["match_score"],
+                "top_matches": sorted(
+                    scores["relevant_sentences"], key=lambda x: x['similarity'], reverse=True
+                )[:3]
+            }
+    
+    batch = []
+    for name, resume_text in resumes:
+        with stage_timer("sentence_split"):
+            resume_sentences = split_sentences(resume_text)
+        if not resume_sentences or not job_sentences:
+            yield {"filename": name, "match_score": 0, "top_matches": []}
+            continue
+        batch.append((name, resume_sentences))
+        if len(batch) >= batch_size:
+            yield from score_batch(batch)
+            batch = []
+    if batch:
+        yield from score_batch(batch)
+    
+    cleanup_memory()
+
 def format_resume_section(section: ResumeSection, max_width: int = 80) -> List[str]:
     formatted_lines = []
     formatted_lines.append(section.name.upper())
@@ -217,8 +379,28 @@ def format_resume_section(section: ResumeSection, max_width: int = 80) -> List[s
     
     return formatted_lines
 
+def format_resume(resume_text: str, max_width: int = 80) -> str:
+    """The resume laid out section by section, sections separated by a blank line.
+
+    Lines above the first section header (name, contact details) come first, untitled.
+    """
+    sections = sorted(extract_sections(resume_text).values(), key=lambda section: section.order)
+    blocks = []
+    if sections:
+        # Sections only hold their bodies; the header line starts after the last newline before the first body
+        preamble = resume_text[:max(resume_text.rfind('\n', 0, sections[0].start), 0)]
+        lines = [line.strip() for line in preamble.split('\n') if line.strip()]
+        if lines:
+            blocks.append([wrapped for line in lines for wrapped in textwrap.wrap(line, width=max_width)])
+    for section in sections:
+        lines = format_resume_section(section, max_width)
+        # "other" is text without a recognised header, so it gets no title
+        blocks.append(lines[2:] if section.name == "other" else lines)
+    return "\n\n".join("\n".join(block) for block in blocks)
+
 def rewrite_experience(exp: Dict, job_description: str) -> str:
     """Rewrite experience to better match job requirements."""
+    from sentence_transformers import util
     try:
         # Extract key requirements from job description
         requirements = re.findall(r'(?:required|must have|looking for|seeking).*?(?:\.|$)', job_description, re.IGNORECASE)
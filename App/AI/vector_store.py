@@ -0,0 +1,268 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .shared_files import ensure_file_size, file_lock, read_appended_lines
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rows per memory-mapped shard file and rows scored per matmul block
+SHARD_ROWS = 65536
+BLOCK_ROWS = 8192
+
+
+def _top_k(scores: np.ndarray, rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the k best (scores, rows) from a block, unsorted."""
+    if len(scores) <= k:
+        return scores, rows
+    best = np.argpartition(-scores, k - 1)[:k]
+    return scores[best], rows[best]
+
+
+class ResumeVectorStore:
+    """Persistent float16 resume embeddings in memory-mapped shard files.
+
+    Layout of ``directory``::
+
+        meta.json          vector dimension
+        index.jsonl        one {"id", "row", "name"} record per resume (sidecar id/offset index)
+        shard-00000.f16    raw float16 rows, SHARD_ROWS rows per shard
+        ivf.npz            optional coarse index (centroids + inverted lists)
+
+    Vectors are L2 normalized on insert so a dot product is the cosine similarity.
+    Pre-fork workers may share the directory: ``add`` holds ``.lock`` and
+    first replays records other workers appended, and ``search`` picks up
+    new records before scanning.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.dim: Optional[int] = None
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.names: Dict[str, str] = {}
+        self._shards: Dict[int, np.memmap] = {}
+        self._ivf = None
+        self._index_offset = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _refresh(self):
+        """Read the dimension once written and replay index records appended since the last call."""
+        if self.dim is None and os.path.exists(self._path("meta.json")):
+            with open(self._path("meta.json"), "r", encoding="utf-8") as meta_file:
+                self.dim = json.load(meta_file)["dim"]
+        lines, self._index_offset = read_appended_lines(self._path("index.jsonl"), self._index_offset)
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record["id"] not in self.rows:
+                self.rows[record["id"]] = record["row"]
+                self.ids.append(record["id"])
+                self.names[record["id"]] = record.get("name", record["id"])
+
+    def _load(self):
+        self._refresh()
+        if os.path.exists(self._path("ivf.npz")):
+            ivf = np.load(self._path("ivf.npz"))
+            self._ivf = {key: ivf[key] for key in ivf.files}
+        logger.info(f"Loaded talent pool with {len(self.ids)} resumes from {self.directory}")
+
+    def _shard(self, shard: int, writable: bool = False) -> np.memmap:
+        """Memory map one shard; rows past the current count are zero and never read."""
+        if writable or shard not in self._shards:
+            path = self._path(f"shard-{shard:05d}.f16")
+            # Sparse file, so an empty shard costs no disk until written; never
+            # truncated, as another worker may be writing to it
+            ensure_file_size(path, SHARD_ROWS * self.dim * 2)
+            mapped = np.memmap(path, dtype=np.float16, mode="r+" if writable else "r",
+                               shape=(SHARD_ROWS, self.dim))
+            if writable:
+                return mapped
+            self._shards[shard] = mapped
+        return self._shards[shard]
+
+    def add(self, ids: List[str], vectors: np.ndarray, names: Optional[List[str]] = None):
+        """Insert or overwrite resume vectors; ``names`` are display names kept from the first insert."""
+        names = names if names is not None else ids
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = (vectors / np.maximum(norms, 1e-12)).astype(np.float16)
+        with self._lock, file_lock(self._path(".lock")):
+            # Rows are numbered after every record any worker has appended
+            self._refresh()
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                with open(self._path("meta.json"), "w", encoding="utf-8") as meta_file:
+                    json.dump({"dim": self.dim}, meta_file)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+
+            records = []
+            writable: Dict[int, np.memmap] = {}
+            for resume_id, name, vector in zip(ids, names, vectors):
+                row = self.rows.get(resume_id)
+                if row is None:
+                    row = len(self.ids)
+                    records.append(json.dumps({"id": resume_id, "row": row, "name": name}) + "\n")
+                shard, offset = divmod(row, SHARD_ROWS)
+                if shard not in writable:
+                    writable[shard] = self._shard(shard, writable=True)
+                writable[shard][offset] = vector
+                if resume_id not in self.rows:
+                    self.rows[resume_id] = row
+                    self.ids.append(resume_id)
+                    self.names[resume_id] = name
+            for mapped in writable.values():
+                mapped.flush()
+            # Vectors are durable before their index records are appended
+            with open(self._path("index.jsonl"), "a", encoding="utf-8") as index_file:
+                index_file.writelines(records)
+            self._index_offset = os.path.getsize(self._path("index.jsonl"))
+
+    def _iter_blocks(self, start: int, stop: int):
+        """Yield (first_row, float16 block) over rows [start, stop) without crossing shards."""
+        row = start
+        while row < stop:
+            shard, offset = divmod(row, SHARD_ROWS)
+            count = min(BLOCK_ROWS, SHARD_ROWS - offset, stop - row)
+            yield row, self._shard(shard)[offset:offset + count]
+            row += count
+
+    def _gather(self, rows: np.ndarray) -> np.ndarray:
+        """Read an arbitrary sorted set of rows, touching one shard at a time."""
+        out = np.empty((len(rows), self.dim), dtype=np.float16)
+        shards = rows // SHARD_ROWS
+        for shard in np.unique(shards):
+            mask = shards == shard
+            out[mask] = self._shard(int(shard))[rows[mask] % SHARD_ROWS]
+        return out
+
+    def search(self, query: np.ndarray, top_k: int = 10, nprobe: Optional[int] = None) -> List[Dict]:
+        """Return the top_k most similar resumes to ``query``.
+
+        Uses blocked brute force by default. When a coarse index exists and
+        ``nprobe`` is given, only the ``nprobe`` closest inverted lists are
+        scanned, plus any rows added after the index was built.
+        """
+        with self._lock:
+            self._refresh()
+        count = len(self.ids)
+        if count == 0 or top_k <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        query = query / max(np.linalg.norm(query), 1e-12)
+
+        best_scores = np.empty(0, dtype=np.float32)
+        best_rows = np.empty(0, dtype=np.int64)
+
+        def merge(scores, rows):
+            nonlocal best_scores, best_rows
+            best_scores, best_rows = _top_k(
+                np.concatenate([best_scores, scores]), np.concatenate([best_rows, rows]), top_k
+            )
+
+        ivf = self._ivf
+        if ivf is not None and nprobe:
+            centroid_scores = ivf["centroids"] @ query
+            probes = np.argsort(-centroid_scores)[:nprobe]
+            for probe in probes:
+                members = ivf["order"][ivf["offsets"][probe]:ivf["offsets"][probe + 1]]
+                for start in range(0, len(members), BLOCK_ROWS):
+                    rows = np.sort(members[start:start + BLOCK_ROWS])
+                    block = self._gather(rows).astype(np.float32)
+                    merge(block @ query, rows)
+            scan_from = int(ivf["indexed_rows"])
+        else:
+            scan_from = 0
+
+        for first_row, block in self._iter_blocks(scan_from, count):
+            scores = block.astype(np.float32) @ query
+            merge(scores, np.arange(first_row, first_row + len(block)))
+
+        order = np.argsort(-best_scores)
+        return [
+            {
+                "id": self.ids[int(best_rows[i])],
+                "name": self.names[self.ids[int(best_rows[i])]],
+                "score": float(best_scores[i]),
+            }
+            for i in order
+        ]
+
+    def build_ivf(self, n_lists: int = 256, iterations: int = 10, sample_size: int = 50000,
+                  seed: int = 0):
+        """Build an IVF-style coarse index with spherical k-means on a sample."""
+        count = len(self.ids)
+        if count == 0:
+            return
+        n_lists = max(1, min(n_lists, count))
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(count, size=min(sample_size, count), replace=False))
+        sample = self._gather(sample_rows).astype(np.float32)
+
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)]
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = sample[assignments == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+        # Assign every stored row in blocks so the whole pool never sits in RAM
+        assignments = np.empty(count, dtype=np.int32)
+        for first_row, block in self._iter_blocks(0, count):
+            assignments[first_row:first_row + len(block)] = np.argmax(
+                block.astype(np.float32) @ centroids.T, axis=1
+            )
+        order = np.argsort(assignments, kind="stable").astype(np.int64)
+        offsets = np.searchsorted(assignments[order], np.arange(n_lists + 1))
+
+        ivf = {
+            "centroids": centroids.astype(np.float32),
+            "order": order,
+            "offsets": offsets,
+            "indexed_rows": np.array(count),
+        }
+        np.savez(self._path("ivf.npz"), **ivf)
+        self._ivf = ivf
+        logger.info(f"Built IVF index with {n_lists} lists over {count} resumes")
+
+
+_store: Optional[ResumeVectorStore] = None
+_store_lock = threading.Lock()
+
+
+def get_talent_pool() -> ResumeVectorStore:
+    """Process wide talent pool stored under TALENT_POOL_DIR."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ResumeVectorStore(os.getenv("TALENT_POOL_DIR", "talent_pool"))
+    return _store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the IVF coarse index for the talent pool")
+    parser.add_argument("--lists", type=int, default=256)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+    get_talent_pool().build_ivf(n_lists=args.lists, iterations=args.iterations)
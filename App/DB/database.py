@@ -1,6 +1,379 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import queue
 import sqlite3
-def save_resume(user_id, original, optimized):
-    conn = sqlite3.connect("resumes.db")
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO resumes VALUES (?, ?, ?)", (user_id, original, optimized))
-    conn.commit()
\ No newline at end of file
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Set RESUME_DB to an empty string to disable persistence
+DATABASE_PATH = os.getenv("RESUME_DB", "resumes.db")
+POOL_SIZE = int(os.getenv("RESUME_DB_POOL_SIZE", "4"))
+# The writer commits everything queued while the previous commit ran, up to WRITE_BATCH_SIZE
+# rows per transaction. WRITE_LINGER_MS > 0 additionally waits that long to grow small batches.
+WRITE_BATCH_SIZE = int(os.getenv("RESUME_DB_WRITE_BATCH", "256"))
+WRITE_LINGER_MS = float(os.getenv("RESUME_DB_LINGER_MS", "0"))
+
+PRAGMAS = (
+    # First, so switching to WAL waits for workers opening the same file instead of failing
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=134217728",
+)
+
+# Schema migrations, applied in order; PRAGMA user_version records how many have run.
+# Never edit an entry that has shipped, append a new one instead.
+MIGRATIONS: List[str] = [
+    # 1: the table save_resume has always written to
+    """
+    CREATE TABLE IF NOT EXISTS resumes (
+        user_id TEXT,
+        original TEXT,
+        optimized TEXT
+    );
+    """,
+    # 2: content hashes, timestamps, analyses and lookup indexes
+    """
+    ALTER TABLE resumes ADD COLUMN content_hash TEXT;
+    ALTER TABLE resumes ADD COLUMN created_at REAL;
+    CREATE INDEX IF NOT EXISTS resumes_user_id ON resumes (user_id);
+    CREATE INDEX IF NOT EXISTS resumes_content_hash ON resumes (content_hash);
+    CREATE TABLE IF NOT EXISTS analyses (
+        id INTEGER PRIMARY KEY,
+        user_id TEXT,
+        content_hash TEXT NOT NULL,
+        job_hash TEXT NOT NULL,
+        model TEXT NOT NULL,
+        match_score INTEGER,
+        analysis TEXT NOT NULL,
+        created_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS analyses_user_id ON analyses (user_id, created_at);
+    CREATE INDEX IF NOT EXISTS analyses_content_hash ON analyses (content_hash);
+    """,
+    # 3: segmented sentences and float16 sentence embeddings per (resume content, model)
+    """
+    CREATE TABLE IF NOT EXISTS resume_embeddings (
+        content_hash TEXT NOT NULL,
+        model TEXT NOT NULL,
+        sentences TEXT NOT NULL,
+        dim INTEGER NOT NULL,
+        embeddings BLOB NOT NULL,
+        created_at REAL NOT NULL,
+        PRIMARY KEY (content_hash, model)
+    );
+    """,
+    # 4: stable analysis ids so finished analyses can be fetched (and rendered) later
+    """
+    ALTER TABLE analyses ADD COLUMN analysis_id TEXT;
+    CREATE INDEX IF NOT EXISTS analyses_analysis_id ON analyses (analysis_id, created_at);
+    """,
+]
+
+INSERT_RESUME = "INSERT INTO resumes (user_id, original, optimized, content_hash, created_at) VALUES (?, ?, ?, ?, ?)"
+UPSERT_EMBEDDINGS = (
+    "INSERT OR REPLACE INTO resume_embeddings (content_hash, model, sentences, dim, embeddings, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+INSERT_ANALYSIS = (
+    "INSERT INTO analyses (user_id, content_hash, job_hash, model, match_score, analysis, created_at, analysis_id) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# (sql, params) queued for the writer thread
+Statement = Tuple[str, Sequence[Any]]
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def split_statements(script: str) -> List[str]:
+    statements, current = [], ""
+    for line in script.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            statements.append(current.strip())
+            current = ""
+    if current.strip():
+        statements.append(current.strip())
+    return statements
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Bring the schema up to date; returns the resulting schema version.
+
+    Each migration runs in its own ``BEGIN IMMEDIATE`` transaction and the
+    version is read inside it, so workers starting together on a fresh
+    database wait for each other and apply every migration exactly once.
+    """
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= len(MIGRATIONS):
+                conn.execute("COMMIT")
+                return len(MIGRATIONS)
+            logger.info(f"Applying database migration {version + 1}")
+            for statement in split_statements(MIGRATIONS[version]):
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+class ConnectionPool:
+    """A fixed set of reader connections handed out one caller at a time."""
+    def __init__(self, path: str, size: int = POOL_SIZE):
+        self._idle: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._all = [connect(path) for _ in range(max(1, size))]
+        for conn in self._all:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        for conn in self._all:
+            conn.close()
+
+
+class Database:
+    """Resume and analysis storage on SQLite.
+
+    Reads go through a connection pool; every write is queued for a single
+    writer thread that groups statements into one transaction per batch.
+    ``submit`` returns a Future that resolves once the row is committed;
+    ``submit_many`` queues statements that are committed (or fail) together.
+    """
+    def __init__(self, path: str = DATABASE_PATH, pool_size: int = POOL_SIZE):
+        self.path = path
+        self._writer_conn = connect(path)
+        self.schema_version = migrate(self._writer_conn)
+        self.pool = ConnectionPool(path, pool_size)
+        self._queue: "queue.Queue[Optional[Tuple[List[Statement], Future]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self.rows_written = 0
+        self.batches_written = 0
+        self.write_errors = 0
+        self._writer = threading.Thread(target=self._write_loop, name="db-writer", daemon=True)
+        self._writer.start()
+
+    def submit(self, sql: str, params: Sequence[Any]) -> Future:
+        return self.submit_many([(sql, params)])
+
+    def submit_many(self, statements: List[Statement]) -> Future:
+        future: Future = Future()
+        self._queue.put((statements, future))
+        return future
+
+    def _next_batch(self) -> Tuple[List[Tuple[List[Statement], Future]], bool]:
+        item = self._queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + WRITE_LINGER_MS / 1000
+        while len(batch) < WRITE_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _commit(self, groups: Dict[str, List[Sequence[Any]]]):
+        try:
+            self._writer_conn.execute("BEGIN")
+            for sql, rows in groups.items():
+                self._writer_conn.executemany(sql, rows)
+            self._writer_conn.execute("COMMIT")
+        except Exception:
+            if self._writer_conn.in_transaction:
+                self._writer_conn.execute("ROLLBACK")
+            raise
+
+    def _write_batch(self, batch: List[Tuple[List[Statement], Future]]):
+        # Rows for the same statement go through one executemany call
+        groups: Dict[str, List[Sequence[Any]]] = {}
+        for statements, _ in batch:
+            for sql, params in statements:
+                groups.setdefault(sql, []).append(params)
+        try:
+            self._commit(groups)
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"Error writing a row to {self.path}: {str(e)}")
+                logger.error(traceback.format_exc())
+                with self._lock:
+                    self.write_errors += 1
+                batch[0][1].set_exception(e)
+                return
+            logger.error(f"Error writing {len(batch)} rows to {self.path}, retrying them one at a time: {str(e)}")
+            failed = True
+        else:
+            failed = False
+        if failed:
+            # Job by job, so one bad row does not fail the unrelated writes queued with it
+            for item in batch:
+                self._write_batch([item])
+            return
+        with self._lock:
+            self.rows_written += sum(len(statements) for statements, _ in batch)
+            self.batches_written += 1
+        for _, future in batch:
+            future.set_result(None)
+
+    def _write_loop(self):
+        while True:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._write_batch(batch)
+            if stopping:
+                break
+
+    def save_resume(self, user_id: str, original: str, optimized: str,
+                    content_hash: Optional[str] = None, sentences: Optional[List[str]] = None,
+                    embeddings: Optional[np.ndarray] = None, model: Optional[str] = None) -> Future:
+        """Queue a resume row, plus its sentences and embeddings when given.
+
+        Both rows are committed in one transaction, so the returned Future
+        fails if either write does. Embeddings are stored once per
+        (content hash, model) as a little-endian float16 BLOB, so identical
+        resumes share them.
+        """
+        content_hash = content_hash or hashlib.sha256(original.encode("utf-8")).hexdigest()
+        statements = [(INSERT_RESUME, (user_id, original, optimized, content_hash, time.time()))]
+        if sentences is not None and embeddings is not None and model:
+            embeddings = np.ascontiguousarray(embeddings, dtype="<f2")
+            if embeddings.ndim != 2 or len(embeddings) != len(sentences):
+                raise ValueError(f"Expected {len(sentences)} sentence embeddings, got shape {embeddings.shape}")
+            statements.append((UPSERT_EMBEDDINGS, (
+                content_hash, model, json.dumps(sentences), embeddings.shape[1], embeddings.tobytes(), time.time()
+            )))
+        return self.submit_many(statements)
+
+    def save_analysis(self, user_id: Optional[str], content_hash: str, job_hash: str, model: str,
+                      match_score: Optional[int], analysis: Dict, analysis_id: Optional[str] = None) -> Future:
+        return self.submit(INSERT_ANALYSIS, (
+            user_id, content_hash, job_hash, model, match_score, json.dumps(analysis), time.time(), analysis_id
+        ))
+
+    def fetch_all(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        with self.pool.connection() as conn:
+            cursor = conn.execute(sql, params)
+            cursor.row_factory = sqlite3.Row
+            return cursor.fetchall()
+
+    def load_analysis(self, analysis_id: str) -> Optional[Dict]:
+        """Most recent stored analysis with this id."""
+        rows = self.fetch_all(
+            "SELECT analysis FROM analyses WHERE analysis_id = ? ORDER BY created_at DESC LIMIT 1", (analysis_id,)
+        )
+        return json.loads(rows[0]["analysis"]) if rows else None
+
+    def resumes_by_hash(self, content_hash: str) -> List[Dict]:
+        rows = self.fetch_all(
+            "SELECT rowid AS id, user_id, original, optimized, content_hash, created_at FROM resumes "
+            "WHERE content_hash = ? ORDER BY created_at DESC", (content_hash,)
+        )
+        return [dict(row) for row in rows]
+
+    def load_resume(self, content_hash: str, model: str) -> Optional[Dict]:
+        """Latest resume with this content hash and its stored embeddings for ``model``."""
+        rows = self.fetch_all(
+            "SELECT r.original, e.sentences, e.dim, e.embeddings FROM resumes r "
+            "JOIN resume_embeddings e ON e.content_hash = r.content_hash "
+            "WHERE r.content_hash = ? AND e.model = ? ORDER BY r.created_at DESC LIMIT 1",
+            (content_hash, model)
+        )
+        if not rows:
+            return None
+        row = rows[0]
+        sentences = json.loads(row["sentences"])
+        embeddings = np.frombuffer(row["embeddings"], dtype="<f2").reshape(len(sentences), row["dim"])
+        return {"text": row["original"], "sentences": sentences, "embeddings": embeddings}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "path": self.path,
+                "schema_version": self.schema_version,
+                "queued": self._queue.qsize(),
+                "rows_written": self.rows_written,
+                "batches_written": self.batches_written,
+                "write_errors": self.write_errors,
+            }
+
+    def close(self):
+        """Flush queued writes, stop the writer and close every connection."""
+        self._queue.put(None)
+        self._writer.join()
+        self._writer_conn.close()
+        self.pool.close()
+
+
+async def run_async(fn, *args) -> Any:
+    """Await a blocking Database call (or the Future it returns) from a coroutine."""
+    result = await asyncio.to_thread(fn, *args)
+    if isinstance(result, Future):
+        return await asyncio.wrap_future(result)
+    return result
+
+
+_database: Optional[Database] = None
+_database_lock = threading.Lock()
+
+
+def get_database() -> Optional[Database]:
+    """Process wide database at RESUME_DB, or None when persistence is disabled."""
+    global _database
+    if _database is None and DATABASE_PATH:
+        with _database_lock:
+            if _database is None:
+                _database = Database()
+    return _database
+
+
+def close_database():
+    global _database
+    with _database_lock:
+        if _database is not None:
+            _database.close()
+            _database = None
+
+
+def save_resume(user_id, original, optimized, content_hash=None, sentences=None, embeddings=None, model=None):
+    """Store a resume (and optionally its sentence embeddings) and wait until it is committed."""
+    database = get_database()
+    if database is None:
+        return
+    database.save_resume(user_id, original, optimized, content_hash, sentences, embeddings, model).result()
@@ -0,0 +1,123 @@
+"""Cold start tooling: import-time profiles and offline model bundles.
+
+Usage::
+
+    python -m App.coldstart importtime main App.main [--budget 1.5] [--top 15] [--json]
+    python -m App.coldstart bundle all-MiniLM-L6-v2 sentence-transformers/all-mpnet-base-v2 --model-dir models
+
+``importtime`` imports each module in a fresh interpreter under
+``python -X importtime`` and reports the total plus the cost per module and
+per top-level package; with ``--budget`` it exits non-zero when a module
+takes longer than that many seconds. ``bundle`` saves models under
+``--model-dir`` so that setting ``MODEL_DIR`` to it loads them without
+contacting the Hugging Face hub.
+"""
+import argparse
+import json
+import logging
+import subprocess
+import sys
+import traceback
+from collections import defaultdict
+from typing import Dict, List
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def parse_importtime(output: str) -> List[Dict]:
+    """Rows of ``-X importtime`` output as {"module", "self_us", "cumulative_us", "depth"}."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "depth": (len(name) - len(name.lstrip(" "))) // 2,
+        })
+    return rows
+
+
+def profile_import(module: str, top: int = 15) -> Dict:
+    """Import ``module`` in a fresh interpreter and summarize where the time went."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "no output"
+        raise RuntimeError(f"Importing {module} failed: {error}")
+    rows = parse_importtime(completed.stderr)
+    packages: Dict[str, int] = defaultdict(int)
+    for row in rows:
+        packages[row["module"].split(".")[0]] += row["self_us"]
+    target = next((row for row in reversed(rows) if row["module"] == module), None)
+    total_us = target["cumulative_us"] if target else sum(row["self_us"] for row in rows)
+    return {
+        "module": module,
+        "total_seconds": total_us / 1e6,
+        "modules_imported": len(rows),
+        "packages": [
+            {"package": name, "seconds": us / 1e6}
+            for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]
+        ],
+        "slowest_modules": [
+            {"module": row["module"], "self_seconds": row["self_us"] / 1e6, "cumulative_seconds": row["cumulative_us"] / 1e6}
+            for row in sorted(rows, key=lambda row: -row["self_us"])[:top]
+        ],
+    }
+
+
+def format_profile(profile: Dict) -> str:
+    lines = [f"{profile['module']}: {profile['total_seconds']:.3f}s, {profile['modules_imported']} modules"]
+    lines.append("  by package (self time):")
+    lines += [f"    {entry['seconds']:8.3f}s  {entry['package']}" for entry in profile["packages"]]
+    lines.append("  slowest modules (self / cumulative):")
+    lines += [
+        f"    {entry['self_seconds']:8.3f}s {entry['cumulative_seconds']:8.3f}s  {entry['module']}"
+        for entry in profile["slowest_modules"]
+    ]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start tooling")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importtime = commands.add_parser("importtime", help="Report import cost per module")
+    importtime.add_argument("modules", nargs="+", help="Modules to import, e.g. main App.main")
+    importtime.add_argument("--top", type=int, default=15)
+    importtime.add_argument("--budget", type=float, default=None, help="Fail when a module takes longer (seconds)")
+    importtime.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    bundle = commands.add_parser("bundle", help="Save models for offline loading from MODEL_DIR")
+    bundle.add_argument("models", nargs="+")
+    bundle.add_argument("--model-dir", required=True)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "bundle":
+            from App.AI.backends import save_model_bundle
+            for model_name in args.models:
+                logger.info(f"Saved {model_name} to {save_model_bundle(model_name, args.model_dir)}")
+            return
+
+        profiles = [profile_import(module, args.top) for module in args.modules]
+        if args.json:
+            print(json.dumps(profiles, indent=2))
+        else:
+            print("\n\n".join(format_profile(profile) for profile in profiles))
+        over = [p["module"] for p in profiles if args.budget is not None and p["total_seconds"] > args.budget]
+        if over:
+            logger.error(f"Import budget of {args.budget}s exceeded by: {', '.join(over)}")
+            sys.exit(1)
+    except Exception as e:
+        logger.error(f"Error running {args.command}: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise
+
+
+if __name__ == "__main__":
+    main()
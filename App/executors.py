@@ -0,0 +1,227 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .tracing import current_trace
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CPU_COUNT = os.cpu_count() or 1
+
+# Stage name -> (pool kind, worker count). Torch releases the GIL during
+# inference so threads are enough there; PDF/DOCX parsing is pure Python
+# and needs processes to run in parallel. Inference threads mostly wait on
+# the micro-batching scheduler, so the pool bounds how many requests can
+# share a batch rather than how many forward passes run at once.
+EXECUTOR_CONFIG: Dict[str, Tuple[str, int]] = {
+    "inference": (
+        os.getenv("INFERENCE_EXECUTOR", "thread"),
+        int(os.getenv("INFERENCE_WORKERS", "8")),
+    ),
+    "parsing": (
+        os.getenv("PARSING_EXECUTOR", "process"),
+        int(os.getenv("PARSING_WORKERS", str(max(1, CPU_COUNT - 1)))),
+    ),
+    # reportlab layout is pure Python as well
+    "rendering": (
+        os.getenv("RENDERING_EXECUTOR", "process"),
+        int(os.getenv("RENDERING_WORKERS", "1")),
+    ),
+}
+
+# Workers are forked from the already-initialised server process so they
+# never re-import the application module (and its model) on startup.
+PROCESS_START_METHOD = os.getenv("EXECUTOR_START_METHOD", "fork")
+
+
+def _timed_call(fn: Callable, args: tuple) -> Tuple[float, int, int, Any]:
+    """Run fn in the worker and report when it actually started, and where."""
+    # time.monotonic is system wide on Linux, so it is comparable across processes
+    return time.monotonic(), os.getpid(), threading.get_ident(), fn(*args)
+
+
+def _span_args(fn: Callable, args: tuple) -> Dict:
+    """Short scalar arguments of a call (engine, page range, ...) for its trace span."""
+    try:
+        bound = inspect.signature(fn).bind(*args).arguments
+    except (TypeError, ValueError):
+        bound = {f"arg{i}": value for i, value in enumerate(args)}
+    return {
+        name: value for name, value in bound.items()
+        # Names like the engine, never document text
+        if isinstance(value, (int, float, bool)) or (isinstance(value, str) and len(value) <= 32 and value.isidentifier())
+    }
+
+
+def _noop() -> None:
+    return None
+
+
+class StageExecutor:
+    """A named thread or process pool that records queue depth and wait time."""
+    def __init__(self, name: str, kind: str, max_workers: int):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind for {name}: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+        self.pool_restarts = 0
+
+    def pool(self) -> Executor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if self.kind == "thread":
+                        self._pool = ThreadPoolExecutor(
+                            max_workers=self.max_workers, thread_name_prefix=f"{self.name}-worker"
+                        )
+                    else:
+                        self._pool = ProcessPoolExecutor(
+                            max_workers=self.max_workers,
+                            mp_context=multiprocessing.get_context(PROCESS_START_METHOD)
+                        )
+                    logger.info(f"Started {self.name} {self.kind} pool with {self.max_workers} workers")
+        return self._pool
+
+    def _replace_broken(self, broken: Executor):
+        """Drop a pool whose worker died so the next call starts a fresh one."""
+        with self._lock:
+            if self._pool is not broken:
+                # Another caller already replaced it
+                return
+            self._pool = None
+            self.pool_restarts += 1
+        logger.error(f"A {self.name} worker process died; restarting the pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def warm_up(self):
+        """Start every worker now instead of on the first request."""
+        futures = [self.pool().submit(_noop) for _ in range(self.max_workers)]
+        for future in futures:
+            future.result()
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run fn(*args) on this stage's pool without blocking the event loop."""
+        submitted = time.monotonic()
+        with self._lock:
+            self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            if self.kind == "thread":
+                # Carries the request's trace into the worker thread
+                call = functools.partial(contextvars.copy_context().run, _timed_call)
+            else:
+                call = _timed_call
+            try:
+                pool = self.pool()
+                started, pid, thread_id, result = await loop.run_in_executor(pool, call, fn, args)
+            except BrokenProcessPool:
+                # A crashed or OOM-killed worker fails every task on its pool. Retry once on a
+                # fresh pool, so only a document that crashes the worker again fails.
+                self._replace_broken(pool)
+                pool = self.pool()
+                try:
+                    started, pid, thread_id, result = await loop.run_in_executor(pool, call, fn, args)
+                except BrokenProcessPool:
+                    self._replace_broken(pool)
+                    raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        finished = time.monotonic()
+        wait = max(0.0, started - submitted)
+        with self._lock:
+            self.completed += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            self.run_seconds_total += finished - started
+        trace = current_trace()
+        if trace is not None:
+            name = getattr(fn, "__name__", "call")
+            trace.add(f"{self.name} queue", submitted, started, {"function": name})
+            trace.add_worker(name, started, finished, pid, thread_id, f"{self.name} worker", _span_args(fn, args))
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "workers": self.max_workers,
+                "in_flight": self.in_flight,
+                "queue_depth": max(0, self.in_flight - self.max_workers),
+                "completed": self.completed,
+                "wait_seconds_avg": self.wait_seconds_total / self.completed if self.completed else 0.0,
+                "wait_seconds_max": self.wait_seconds_max,
+                "run_seconds_avg": self.run_seconds_total / self.completed if self.completed else 0.0,
+                "pool_restarts": self.pool_restarts,
+            }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_executors: Dict[str, StageExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(stage: str) -> StageExecutor:
+    """Shared executor for a pipeline stage configured in EXECUTOR_CONFIG."""
+    executor = _executors.get(stage)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(stage)
+            if executor is None:
+                kind, workers = EXECUTOR_CONFIG[stage]
+                executor = StageExecutor(stage, kind, workers)
+                _executors[stage] = executor
+    return executor
+
+
+async def run_inference(fn: Callable, *args) -> Any:
+    """Run a model bound call (encode, similarity) off the event loop."""
+    return await get_executor("inference").run(fn, *args)
+
+
+async def run_parsing(fn: Callable, *args) -> Any:
+    """Run PDF/DOCX parsing off the event loop."""
+    return await get_executor("parsing").run(fn, *args)
+
+
+async def run_rendering(fn: Callable, *args) -> Any:
+    """Run PDF rendering off the event loop."""
+    return await get_executor("rendering").run(fn, *args)
+
+
+def start_executors():
+    """Create and warm every configured pool; call from an app startup hook."""
+    for stage in EXECUTOR_CONFIG:
+        get_executor(stage).warm_up()
+
+
+def shutdown_executors():
+    for executor in list(_executors.values()):
+        executor.shutdown()
+
+
+def executor_stats() -> Dict:
+    return {name: executor.stats() for name, executor in _executors.items()}
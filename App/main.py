@@ -1,28 +1,44 @@
-from fastapi import FastAPI, UploadFile, Form, File, HTTPException
+from fastapi import FastAPI, UploadFile, Form, File, HTTPException, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from .AI.tailor import enhance_resume
-import io
-import PyPDF2
-from docx import Document
+from starlette.background import BackgroundTask
+from .AI import tailor
+from .AI.tailor import (enhance_resume, rank_resumes, embed_document, split_sentences, encode_for_storage,
+                        rescore_resume)
+from .AI.vector_store import get_talent_pool
+from .AI.skills import get_skill_matcher
+from .AI.parser import extract_pdf_pages, extract_pdf_pages_parallel, engine_stats, open_source, pdf_page_count
+from .text_cache import ParsedDocument, get_parsed_text_cache
+from .result_cache import result_key, get_result_cache
+from .DB.database import get_database, close_database, run_async
+from .uploads import (MAX_UPLOAD_BYTES, LimitRequestSize, ReceivedUpload, Source, close_uploads, open_upload,
+                      check_page_limit)
+from .executors import run_inference, run_parsing, run_rendering, start_executors, shutdown_executors, executor_stats
+from .AI.embedding_cache import get_embedding_cache
+from .rendering import get_render_cache, render_pdf, stream_zip
+from .startup import get_model_loader, require_model, warm_up
+from .metrics import metrics_response, stage_timer, track_requests
+from .tracing import trace_path, trace_requests
+import asyncio
 import logging
 import traceback
 import os
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 import time
-import tempfile
-from typing import Optional
+import json
+import hashlib
+import zipfile
+from typing import AsyncIterator, Awaitable, Callable, Iterator, List, Optional, Tuple
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Number of resumes extracted and encoded together by /api/rank-resumes
+RANK_BATCH_SIZE = int(os.getenv("RANK_BATCH_SIZE", "32"))
+# Documents analyzed/rendered at once by a bulk export; bounds its memory use
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", "4"))
+
 app = FastAPI()
 
 # Configure CORS
@@ -34,6 +50,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Cut off oversized request bodies while they are received
+app.add_middleware(LimitRequestSize, single_upload_paths=["/api/enhance-resume", "/api/resumes"])
+# Latency and in-flight requests for /metrics
+app.middleware("http")(track_requests)
+# Opt-in per-request timelines (TRACE_SAMPLE_RATE, or an allowed X-Trace header)
+app.middleware("http")(trace_requests)
+
+# Start the inference/parsing pools with the app and stop them with it
+@app.on_event("startup")
+async def startup_executors():
+    start_executors()
+    # Compile the skills automaton once rather than on the first request
+    get_skill_matcher()
+    # Open the pool and apply pending schema migrations before serving
+    get_database()
+    # The port is bound while the weights load; /health/ready reports when requests can be served
+    get_model_loader().start(tailor.load_model, lambda loaded: warm_up(loaded.encode))
+
+@app.on_event("shutdown")
+async def stop_executors():
+    shutdown_executors()
+    # Flushes writes still queued for the database writer
+    close_database()
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="frontend"), name="static")
 
@@ -46,27 +86,25 @@ async def read_index():
 async def read_results():
     return FileResponse("frontend/src/pages/results.html")
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
+def extract_text_from_pdf(source: Source, filename: str = "PDF") -> str:
     try:
         logger.info("Extracting text from PDF...")
-        pdf_file = io.BytesIO(file_bytes)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            page_text = page.extract_text()
-            logger.info(f"PDF Page Content: {page_text[:200]}...")  # Log first 200 chars
-            text += page_text + "\n"
-        return text.strip()
+        check_page_limit(filename, pdf_page_count(source))
+        return "\n".join(extract_pdf_pages(source)).strip()
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {str(e)}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=400, detail=f"Error processing PDF file: {str(e)}")
 
-def extract_text_from_docx(file_bytes: bytes) -> str:
+def extract_text_from_docx(source: Source) -> str:
+    # Imported on first use to keep python-docx out of the startup path
+    from docx import Document
     try:
         logger.info("Extracting text from DOCX...")
-        docx_file = io.BytesIO(file_bytes)
-        doc = Document(docx_file)
+        with open_source(source) as docx_file:
+            doc = Document(docx_file)
         text = []
         for paragraph in doc.paragraphs:
             if paragraph.text.strip():
@@ -78,119 +116,567 @@ def extract_text_from_docx(file_bytes: bytes) -> str:
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=400, detail=f"Error processing DOCX file: {str(e)}")
 
-def generate_pdf(resume_text: str) -> bytes:
-    """Generate a PDF from the resume text."""
+def extract_resume_text(filename: str, source: Source) -> str:
+    """Extract text from a PDF or DOCX upload based on its file name."""
+    if filename.lower().endswith('.pdf'):
+        return extract_text_from_pdf(source, filename)
+    return extract_text_from_docx(source)
+
+def extract_resume_text_in_worker(filename: str, source: Source) -> str:
+    """Process pool entry point; HTTPException cannot be pickled back to the parent."""
     try:
-        # Create a buffer to store the PDF
-        buffer = io.BytesIO()
-        
-        # Create the PDF document
-        doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
-        
-        # Create styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            spaceAfter=20,
-            textColor=colors.HexColor('#2c3e50')
-        )
-        section_style = ParagraphStyle(
-            'CustomSection',
-            parent=styles['Heading2'],
-            fontSize=14,
-            spaceAfter=10,
-            textColor=colors.HexColor('#3498db')
-        )
-        body_style = ParagraphStyle(
-            'CustomBody',
-            parent=styles['Normal'],
-            fontSize=10,
-            spaceAfter=5,
-            leading=14
-        )
-        
-        # Split the resume into sections
-        sections = resume_text.split('\n\n')
-        story = []
-        
-        for section in sections:
-            if section.startswith('='):
-                # Skip separator lines
-                continue
-            elif section.upper() == section and not section.startswith('['):
-                # This is a section header
-                story.append(Paragraph(section, section_style))
-            else:
-                # This is body text
-                story.append(Paragraph(section, body_style))
-                story.append(Spacer(1, 5))
-        
-        # Build the PDF
-        doc.build(story)
-        
-        # Get the PDF bytes
-        pdf_bytes = buffer.getvalue()
-        buffer.close()
-        
-        return pdf_bytes
-    except Exception as e:
-        logger.error(f"Error generating PDF: {str(e)}")
+        return extract_resume_text(filename, source)
+    except HTTPException as e:
+        raise ValueError(e.detail)
+
+def parsed_kind(filename: str) -> str:
+    """Parsed text cache namespace for this app's extractors."""
+    return "app.pdf" if filename.lower().endswith('.pdf') else "app.docx"
+
+def extract_resume_document(filename: str, source: Source, digest: str) -> ParsedDocument:
+    """Extract text synchronously, reusing the parsed text of identical uploads."""
+    cache = get_parsed_text_cache()
+    document = cache.get(digest, parsed_kind(filename))
+    if document is None:
+        with stage_timer("extraction"):
+            resume_text = extract_resume_text(filename, source)
+        with stage_timer("sentence_split"):
+            sentences = split_sentences(resume_text)
+        document = cache.put(digest, parsed_kind(filename), resume_text, sentences)
+    return document
+
+async def parse_resume(filename: str, source: Source, digest: str) -> ParsedDocument:
+    """Extract resume text in the parsing pool unless this upload was parsed before.
+
+    ``source`` is passed to the pool as is, so uploads Starlette kept on disk
+    are opened by path in the worker rather than pickled across.
+    """
+    cache = get_parsed_text_cache()
+    # The cache reads and writes SQLite, so it stays off the event loop
+    document = await run_async(cache.get, digest, parsed_kind(filename))
+    if document is None:
+        try:
+            with stage_timer("extraction"):
+                if filename.lower().endswith('.pdf'):
+                    page_count = await run_parsing(pdf_page_count, source)
+                    check_page_limit(filename, page_count)
+                    # Large PDFs are split into page ranges extracted in parallel
+                    pages = await extract_pdf_pages_parallel(source, run_parsing, page_count=page_count)
+                    resume_text = "\n".join(pages).strip()
+                else:
+                    resume_text = await run_parsing(extract_resume_text_in_worker, filename, source)
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logger.error(f"Error extracting text from PDF: {str(e)}")
+            raise HTTPException(status_code=400, detail=f"Error processing PDF file: {str(e)}")
+        with stage_timer("sentence_split"):
+            sentences = split_sentences(resume_text)
+        document = await run_async(cache.put, digest, parsed_kind(filename), resume_text, sentences)
+    return document
+
+def iter_resume_files(uploads: List[ReceivedUpload],
+                      on_error: Callable[[str, str], None]) -> Iterator[Tuple[str, Source, str]]:
+    """Yield (filename, source, digest) for every PDF/DOCX upload, expanding zip archives.
+
+    Archive members are decompressed one at a time and never past
+    MAX_UPLOAD_BYTES; oversized or unreadable members are reported through
+    ``on_error(filename, detail)`` and skipped.
+    """
+    for upload in uploads:
+        if upload.filename.lower().endswith('.zip'):
+            try:
+                with zipfile.ZipFile(open_source(upload.source())) as archive:
+                    for info in archive.infolist():
+                        if info.is_dir() or not info.filename.lower().endswith(('.pdf', '.docx')):
+                            continue
+                        with archive.open(info) as member:
+                            # file_size comes from the archive itself, so bound the actual read too
+                            content = member.read(MAX_UPLOAD_BYTES + 1)
+                        if len(content) > MAX_UPLOAD_BYTES:
+                            on_error(info.filename, f"{info.filename} exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit")
+                            continue
+                        yield info.filename, content, hashlib.sha256(content).hexdigest()
+            except zipfile.BadZipFile as e:
+                on_error(upload.filename, f"Error reading ZIP file: {str(e)}")
+        elif upload.filename.lower().endswith(('.pdf', '.docx')):
+            yield upload.filename, upload.source(), upload.digest
+
+def unique_entry_name(stem: str, used: set) -> str:
+    """Archive name ``<stem>.pdf``, numbered when the stem was already used."""
+    name = f"{stem or 'resume'}.pdf"
+    counter = 1
+    while name in used:
+        counter += 1
+        name = f"{stem or 'resume'}-{counter}.pdf"
+    used.add(name)
+    return name
+
+async def open_uploads(resumes: List[UploadFile]) -> List[ReceivedUpload]:
+    """Open every upload of a multi-file request, closing all of them on failure."""
+    uploads = []
+    try:
+        for resume in resumes:
+            uploads.append(await open_upload(resume))
+    except BaseException:
+        close_uploads(uploads)
         raise
+    return uploads
+
+async def analyze_resume_upload(filename: str, source: Source, digest: str, job_description: str,
+                                user_id: Optional[str] = None,
+                                release: Optional[Callable[[], None]] = None) -> Tuple[str, dict]:
+    """Analyze one resume, returning its analysis id (the result cache key) and the result.
+
+    The analysis is recorded in the database when it is computed, not when it
+    comes from the result cache. ``release`` frees ``source`` and is called once
+    nothing reads it any more, which can be after this call returns if other
+    requests share the computation.
+    """
+    # Identical submissions skip parsing and encoding; concurrent ones share one computation
+    key = result_key("app", digest, job_description, tailor.MODEL_NAME)
+
+    async def compute():
+        document = await parse_resume(filename, source, digest)
+        try:
+            result = await run_inference(enhance_resume, document.text, job_description, document.sentences)
+        except Exception as e:
+            logger.error(f"Error enhancing resume: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise HTTPException(status_code=500, detail="Error processing resume")
+        record_analysis(user_id, digest, job_description, key, result)
+        return result
+    
+    return key, await get_result_cache().get_or_compute(key, compute, release=release)
 
-@app.post("/api/enhance-resume")
+def record_analysis(user_id: Optional[str], digest: str, job_description: str, analysis_id: str, result: dict):
+    """Queue the analysis for the database writer thread; callers do not wait for the commit."""
+    database = get_database()
+    if database is not None:
+        database.save_analysis(
+            user_id, digest, hashlib.sha256(job_description.encode("utf-8")).hexdigest(),
+            tailor.MODEL_NAME, result.get("match_score"), result, analysis_id
+        )
+
+async def load_analysis(analysis_id: str) -> Optional[dict]:
+    """A finished analysis from the result cache, or the database once it has been evicted."""
+    result = get_result_cache().get(analysis_id)
+    if result is None:
+        database = get_database()
+        if database is not None:
+            result = await run_async(database.load_analysis, analysis_id)
+    return result
+
+def resume_document(result: dict) -> str:
+    """The formatted resume stored with an analysis, which is what gets rendered."""
+    text = result.get("resume_document")
+    if text is None:
+        # Analyses stored before resume documents were kept with them
+        raise HTTPException(status_code=404, detail="No resume document is stored for this analysis")
+    return text
+
+async def render_analysis(analysis_id: str, text: str) -> bytes:
+    """PDF bytes for an analysis' resume document, rendered in the rendering pool unless cached."""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    cache = get_render_cache()
+    pdf_bytes = cache.get(analysis_id, digest)
+    if pdf_bytes is None:
+        with stage_timer("pdf_render"):
+            pdf_bytes = await run_rendering(render_pdf, text)
+        cache.put(analysis_id, digest, pdf_bytes)
+    return pdf_bytes
+
+@app.post("/api/enhance-resume", dependencies=[Depends(require_model)])
 async def enhance_resume_endpoint(
     resume: UploadFile = File(...),
-    job_description: str = Form(...)
+    job_description: str = Form(...),
+    user_id: Optional[str] = Form(None)
 ):
+    upload = None
+    handed_off = False
     try:
         # Validate file type
         if not resume.filename.lower().endswith((".pdf", ".docx")):
             raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
-        content = await resume.read()
-        if resume.filename.lower().endswith('.pdf'):
-            pdf_file = io.BytesIO(content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            resume_text = ""
-            for page in pdf_reader.pages:
-                resume_text += page.extract_text() + "\n"
-        else:
-            docx_file = io.BytesIO(content)
-            doc = Document(docx_file)
-            resume_text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
         if not job_description or not job_description.strip():
             raise HTTPException(status_code=400, detail="Job description is required")
-        try:
-            result = enhance_resume(resume_text, job_description)
-            return JSONResponse(content={"analysis": result["analysis"]})
-        except Exception as e:
-            logger.error(f"Error enhancing resume: {str(e)}")
-            logger.error(traceback.format_exc())
-            raise HTTPException(status_code=500, detail="Error processing resume")
+        # Hashed where Starlette received it; the body size was capped while it arrived
+        upload = await open_upload(resume)
+        # The shared computation may outlive this request, so the cache closes the upload
+        handed_off = True
+        key, result = await analyze_resume_upload(
+            resume.filename, upload.source(), upload.digest, job_description, user_id, release=upload.close
+        )
+        return JSONResponse(content={"analysis": result["analysis"], "analysis_id": key})
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail="Internal server error")
+    finally:
+        if upload is not None and not handed_off:
+            upload.close()
+
+@app.post("/api/rank-resumes", dependencies=[Depends(require_model)])
+async def rank_resumes_endpoint(
+    resumes: List[UploadFile] = File(...),
+    job_description: str = Form(...)
+):
+    if not job_description or not job_description.strip():
+        raise HTTPException(status_code=400, detail="Job description is required")
+    for resume in resumes:
+        if not resume.filename.lower().endswith((".pdf", ".docx", ".zip")):
+            raise HTTPException(status_code=400, detail="Only PDF, DOCX and ZIP files are supported")
+    uploads = await open_uploads(resumes)
+
+    def extracted_resumes(errors: List[dict]) -> Iterator[Tuple[str, str]]:
+        def on_error(filename: str, detail: str):
+            errors.append({"type": "error", "filename": filename, "detail": detail})
+
+        for filename, source, digest in iter_resume_files(uploads, on_error):
+            try:
+                yield filename, extract_resume_document(filename, source, digest).text
+            except HTTPException as e:
+                on_error(filename, e.detail)
+
+    def stream_results() -> Iterator[str]:
+        # Runs in Starlette's threadpool since this is a sync generator
+        errors: List[dict] = []
+        scores = []
+        try:
+            for result in rank_resumes(extracted_resumes(errors), job_description, batch_size=RANK_BATCH_SIZE):
+                while errors:
+                    yield json.dumps(errors.pop(0)) + "\n"
+                scores.append((result["match_score"], result["filename"]))
+                yield json.dumps({"type": "result", **result}) + "\n"
+            for error in errors:
+                yield json.dumps(error) + "\n"
+        except Exception as e:
+            logger.error(f"Error ranking resumes: {str(e)}")
+            logger.error(traceback.format_exc())
+            yield json.dumps({"type": "error", "detail": "Error ranking resumes"}) + "\n"
+            return
+        ranking = [
+            {"rank": rank, "filename": filename, "match_score": score}
+            for rank, (score, filename) in enumerate(sorted(scores, key=lambda x: -x[0]), start=1)
+        ]
+        yield json.dumps({"type": "ranking", "ranking": ranking}) + "\n"
+
+    # Runs once the response is done, even if the body was never iterated
+    return StreamingResponse(
+        stream_results(), media_type="application/x-ndjson", background=BackgroundTask(close_uploads, uploads)
+    )
+
+@app.post("/api/talent-pool", dependencies=[Depends(require_model)])
+async def add_to_talent_pool(resumes: List[UploadFile] = File(...)):
+    """Index resumes into the persistent talent pool, keyed by content hash.
+
+    Re-uploading a resume updates its entry, and different resumes that share
+    a file name are kept apart; search results carry the file name as ``name``.
+    """
+    uploads = await open_uploads(resumes)
+    added = []
+    errors = []
+
+    def on_error(filename: str, detail: str):
+        errors.append({"filename": filename, "detail": detail})
+
+    try:
+        for filename, source, digest in iter_resume_files(uploads, on_error):
+            try:
+                document = await parse_resume(filename, source, digest)
+                added.append((digest, filename, await run_inference(embed_document, document.text)))
+            except HTTPException as e:
+                on_error(filename, e.detail)
+    finally:
+        close_uploads(uploads)
+    if added:
+        get_talent_pool().add(
+            [digest for digest, _, _ in added], [vector for _, _, vector in added],
+            names=[filename for _, filename, _ in added]
+        )
+    return {
+        "added": len(added),
+        "resumes": [{"id": digest, "name": filename} for digest, filename, _ in added],
+        "errors": errors,
+        "pool_size": len(get_talent_pool()),
+    }
+
+@app.post("/api/search", dependencies=[Depends(require_model)])
+async def search_talent_pool(
+    job_description: str = Form(...),
+    top_k: int = Form(10),
+    nprobe: Optional[int] = Form(None)
+):
+    if not job_description or not job_description.strip():
+        raise HTTPException(status_code=400, detail="Job description is required")
+    try:
+        start = time.perf_counter()
+        query = await run_inference(embed_document, job_description)
+        results = await run_inference(get_talent_pool().search, query, top_k, nprobe)
+        return {"results": results, "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)}
+    except Exception as e:
+        logger.error(f"Error searching talent pool: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail="Error searching talent pool")
+
+@app.get("/api/embedding-cache/stats")
+async def embedding_cache_stats():
+    return get_embedding_cache().stats()
+
+@app.get("/api/parsed-cache/stats")
+async def parsed_cache_stats():
+    return get_parsed_text_cache().stats()
+
+@app.get("/api/pdf-engines/stats")
+async def pdf_engine_stats():
+    return engine_stats()
+
+@app.get("/api/result-cache/stats")
+async def result_cache_stats():
+    return get_result_cache().stats()
+
+@app.post("/api/resumes", dependencies=[Depends(require_model)])
+async def save_resume_endpoint(
+    resume: UploadFile = File(...),
+    user_id: Optional[str] = Form(None)
+):
+    """Store a resume with its sentences and float16 sentence embeddings for later re-scoring."""
+    database = get_database()
+    if database is None:
+        raise HTTPException(status_code=503, detail="Persistence is disabled")
+    if not resume.filename.lower().endswith((".pdf", ".docx")):
+        raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
+    upload = await open_upload(resume)
+    try:
+        document = await parse_resume(resume.filename, upload.source(), upload.digest)
+        embeddings = await run_inference(encode_for_storage, document.sentences)
+        await asyncio.wrap_future(database.save_resume(
+            user_id, document.text, "", upload.digest, document.sentences, embeddings, tailor.MODEL_NAME
+        ))
+    finally:
+        upload.close()
+    return {"content_hash": upload.digest, "sentences": len(document.sentences), "model": tailor.MODEL_NAME}
+
+@app.post("/api/resumes/{content_hash}/score", dependencies=[Depends(require_model)])
+async def rescore_resume_endpoint(content_hash: str, job_description: str = Form(...)):
+    """Score a stored resume against a new job description, encoding only the job side."""
+    database = get_database()
+    if database is None:
+        raise HTTPException(status_code=503, detail="Persistence is disabled")
+    if not job_description.strip():
+        raise HTTPException(status_code=400, detail="Job description is required")
+    stored = await run_async(database.load_resume, content_hash, tailor.MODEL_NAME)
+    if stored is None:
+        raise HTTPException(status_code=404, detail=f"No stored resume {content_hash} for {tailor.MODEL_NAME}")
+    result = await run_inference(
+        rescore_resume, stored["text"], stored["sentences"], stored["embeddings"], job_description
+    )
+    return {"analysis": result["analysis"], "match_score": result["match_score"]}
+
+@app.get("/api/db/stats")
+async def database_stats():
+    database = get_database()
+    return database.stats() if database is not None else {"enabled": False}
+
+@app.get("/api/executors/stats")
+async def executors_stats():
+    return executor_stats()
+
+@app.get("/api/scheduler/stats")
+async def scheduler_stats():
+    if tailor.scheduler is None:
+        return {"enabled": tailor.MICRO_BATCHING, "started": False}
+    return {"enabled": True, "started": True, **tailor.scheduler.stats()}
 
 @app.get("/api/download-resume")
-async def download_resume():
+async def download_resume(request: Request, analysis_id: str):
     try:
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            # Create PDF using the enhanced resume content
-            pdf_bytes = create_pdf(enhanced_resume)
-            temp_file.write(pdf_bytes)
-            temp_file_path = temp_file.name
+        result = await load_analysis(analysis_id)
+        if result is None:
+            raise HTTPException(status_code=404, detail="Analysis not found")
         
-        return FileResponse(
-            temp_file_path,
+        text = resume_document(result)
+        etag = f'"{hashlib.sha256(text.encode("utf-8")).hexdigest()}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        # Laid out in the rendering worker; the bytes go straight into the response
+        pdf_bytes = await render_analysis(analysis_id, text)
+        return Response(
+            content=pdf_bytes,
             media_type='application/pdf',
-            filename="enhanced_resume.pdf"
+            headers={"Content-Disposition": 'attachment; filename="enhanced_resume.pdf"', "ETag": etag}
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating PDF: {str(e)}")
         logger.error(traceback.format_exc())
-        raise HTTPException(status_code=500, detail="Error creating PDF") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Error creating PDF")
+
+@app.post("/api/export-resumes", dependencies=[Depends(require_model)])
+async def export_resumes(
+    analysis_ids: List[str] = Form([]),
+    resumes: List[UploadFile] = File([]),
+    job_description: List[str] = Form([]),
+    user_id: Optional[str] = Form(None)
+):
+    """Stream a zip of PDFs for stored analyses and/or freshly analyzed resumes.
+
+    Uploaded resumes (PDF, DOCX or ZIP) are paired with ``job_description``
+    by position, or all use it when only one is given. Documents are
+    analyzed and rendered EXPORT_CONCURRENCY at a time and written to the
+    archive in the order they finish; ``manifest.json`` at the end lists
+    every entry and every document that failed. Each upload is copied out of
+    the request only when its turn comes, so an oversized one is reported in
+    the manifest rather than failing the request.
+    """
+    if not analysis_ids and not resumes:
+        raise HTTPException(status_code=400, detail="Provide analysis ids or resumes to export")
+    if resumes:
+        if len(job_description) not in (1, len(resumes)):
+            raise HTTPException(status_code=400, detail="Provide one job description, or one per resume")
+        if not all(jd and jd.strip() for jd in job_description):
+            raise HTTPException(status_code=400, detail="Job description is required")
+        for resume in resumes:
+            if not resume.filename.lower().endswith((".pdf", ".docx", ".zip")):
+                raise HTTPException(status_code=400, detail="Only PDF, DOCX and ZIP files are supported")
+    errors: List[dict] = []
+    # Uploads not yet handed to the result cache; closed once the response is done
+    unreleased = set()
+    
+    async def stored_pdf(analysis_id: str) -> Tuple[str, bytes]:
+        result = await load_analysis(analysis_id)
+        if result is None:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+        return analysis_id, await render_analysis(analysis_id, resume_document(result))
+    
+    async def uploaded_pdf(filename: str, source: Source, digest: str, jd: str,
+                           upload: Optional[ReceivedUpload] = None) -> Tuple[str, bytes]:
+        release = None
+        if upload is not None:
+            # The shared computation may outlive this export, so the cache closes the upload
+            unreleased.discard(upload)
+            release = upload.close
+        key, result = await analyze_resume_upload(filename, source, digest, jd, user_id, release=release)
+        return filename, await render_analysis(key, resume_document(result))
+    
+    async def export_jobs() -> AsyncIterator[Tuple[str, Awaitable[Tuple[str, bytes]]]]:
+        """(label, coroutine) per document; uploads are hashed, and zip members read, only when due."""
+        def on_error(filename: str, detail: str):
+            errors.append({"document": filename, "detail": detail})
+
+        for analysis_id in analysis_ids:
+            yield analysis_id, stored_pdf(analysis_id)
+        for index, resume in enumerate(resumes):
+            jd = job_description[index if len(job_description) > 1 else 0]
+            try:
+                upload = await open_upload(resume)
+            except HTTPException as e:
+                on_error(resume.filename, e.detail)
+                continue
+            unreleased.add(upload)
+            if not upload.filename.lower().endswith(".zip"):
+                yield upload.filename, uploaded_pdf(upload.filename, upload.source(), upload.digest, jd, upload)
+                continue
+            # Members are read into memory, so the archive is closed once they are all yielded
+            try:
+                members = iter_resume_files([upload], on_error)
+                while True:
+                    # Zip members are decompressed off the event loop
+                    member = await asyncio.to_thread(next, members, None)
+                    if member is None:
+                        break
+                    filename, source, digest = member
+                    yield filename, uploaded_pdf(filename, source, digest, jd)
+            finally:
+                unreleased.discard(upload)
+                upload.close()
+    
+    async def rendered_documents() -> AsyncIterator[Tuple[str, bytes]]:
+        jobs = export_jobs()
+        pending = {}
+        names = set()
+        exported = []
+        exhausted = False
+        try:
+            while pending or not exhausted:
+                while not exhausted and len(pending) < EXPORT_CONCURRENCY:
+                    try:
+                        label, job = await jobs.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                    else:
+                        pending[asyncio.ensure_future(job)] = label
+                if not pending:
+                    break
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    label = pending.pop(task)
+                    try:
+                        stem, pdf_bytes = task.result()
+                    except HTTPException as e:
+                        errors.append({"document": label, "detail": e.detail})
+                        continue
+                    except Exception as e:
+                        logger.error(f"Error exporting {label}: {str(e)}")
+                        logger.error(traceback.format_exc())
+                        errors.append({"document": label, "detail": "Error exporting resume"})
+                        continue
+                    name = unique_entry_name(os.path.splitext(os.path.basename(stem))[0], names)
+                    exported.append({"document": label, "file": name})
+                    yield name, pdf_bytes
+            manifest = {"exported": exported, "errors": errors}
+            yield "manifest.json", json.dumps(manifest, indent=2).encode("utf-8")
+        finally:
+            for task in pending:
+                task.cancel()
+            await jobs.aclose()
+    
+    # Jobs cancelled before they started never handed their upload over
+    return StreamingResponse(
+        stream_zip(rendered_documents()),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="tailored_resumes.zip"'},
+        background=BackgroundTask(close_uploads, unreleased)
+    )
+
+@app.get("/metrics")
+async def metrics():
+    return metrics_response()
+
+@app.get("/api/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    path = trace_path(trace_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return FileResponse(path, media_type="application/json", filename=f"{trace_id}.trace.json")
+
+@app.get("/api/traces/{trace_id}/profile")
+async def get_trace_profile(trace_id: str):
+    path = trace_path(trace_id, ".prof")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{trace_id}.prof")
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", **get_model_loader().report()}
+
+@app.get("/health/live")
+async def health_live():
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def health_ready():
+    report = get_model_loader().report()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
+@app.get("/api/render-cache/stats")
+async def render_cache_stats():
+    return get_render_cache().stats()
+
+get_model_loader().mark_imported()
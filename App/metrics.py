@@ -0,0 +1,258 @@
+"""Request and pipeline metrics in the Prometheus text exposition format.
+
+Histograms and gauges are plain Python objects guarded by a lock, so
+observing a value costs a bisect and a few additions. Values owned by other
+components (executor queues, cache hit ratios, memory) are read from their
+``stats()`` when ``/metrics`` is scraped rather than tracked separately.
+"""
+import bisect
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from .tracing import span
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SENTENCE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 2048, 4096, 8192, 16384)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        name + '="' + str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') + '"'
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per combination of label values."""
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labelvalues: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labelvalues)
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labelvalues, counts, total in series:
+            labels = dict(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """A value that goes up and down, one series per combination of label values."""
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *labelvalues: str):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, *labelvalues: str):
+        self.inc(-amount, *labelvalues)
+
+    def set(self, value: float, *labelvalues: str):
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return gauge_lines(self.name, self.documentation, [
+            (dict(zip(self.labelnames, labelvalues)), value) for labelvalues, value in values
+        ])
+
+
+def gauge_lines(name: str, documentation: str, samples: List[Tuple[Dict[str, str], float]]) -> List[str]:
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+    lines += [f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples]
+    return lines
+
+
+class Registry:
+    """Metrics rendered by /metrics: registered metrics plus collectors called at scrape time."""
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], List[str]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += metric.collect()
+        for collector in self._collectors:
+            try:
+                lines += collector()
+            except Exception as e:
+                logger.error(f"Error collecting metrics from {collector.__name__}: {str(e)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "resume_stage_seconds",
+    "Time spent per pipeline stage (upload_read, extraction, sentence_split, encode, similarity, formatting, pdf_render)",
+    ["stage"]
+))
+ENCODE_SENTENCES = REGISTRY.register(Histogram(
+    "resume_encode_batch_sentences", "Sentences per model forward batch", buckets=SENTENCE_BUCKETS
+))
+ENCODE_TOKENS = REGISTRY.register(Histogram(
+    "resume_encode_batch_tokens", "Tokens per model forward batch", buckets=TOKEN_BUCKETS
+))
+ENCODE_CALL_SENTENCES = REGISTRY.register(Histogram(
+    "resume_encode_call_sentences",
+    "Sentences per model.encode call made without the inference scheduler (split into forward batches by the model)",
+    buckets=SENTENCE_BUCKETS
+))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response starts", ["method", "route", "status"]
+))
+REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled"
+))
+
+
+@contextmanager
+def stage_timer(stage: str, **args) -> Iterator[Dict]:
+    """``with stage_timer("encode"):`` records the block's duration for that stage.
+
+    In a traced request the block is also a span; ``args`` and anything added
+    to the yielded dict become its arguments.
+    """
+    with STAGE_SECONDS.time(stage), span(stage, **args) as span_args:
+        yield span_args
+
+
+def process_resident_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def collect_runtime() -> List[str]:
+    """Executor queues, cache hit ratios and memory, read from their owners at scrape time."""
+    from .executors import executor_stats
+    from .result_cache import get_result_cache
+    from .startup import get_model_loader
+    from .text_cache import get_parsed_text_cache
+    from .AI.embedding_cache import get_embedding_cache
+
+    stages = executor_stats()
+    lines = gauge_lines("resume_executor_queue_depth", "Tasks waiting for a worker, per executor stage", [
+        ({"stage": stage}, stats["queue_depth"]) for stage, stats in stages.items()
+    ])
+    lines += gauge_lines("resume_executor_in_flight", "Tasks submitted and not yet finished, per executor stage", [
+        ({"stage": stage}, stats["in_flight"]) for stage, stats in stages.items()
+    ])
+
+    caches = {
+        "embedding": get_embedding_cache().stats(),
+        "parsed_text": get_parsed_text_cache().stats(),
+        "result": get_result_cache().stats(),
+    }
+    # Only apps that render PDFs have imported the render cache
+    rendering = sys.modules.get(f"{__package__}.rendering")
+    if rendering is not None:
+        caches["render"] = rendering.get_render_cache().stats()
+    lines += gauge_lines("resume_cache_hit_ratio", "Hit ratio of each cache since startup", [
+        ({"cache": name}, stats["hit_ratio"]) for name, stats in caches.items()
+    ])
+
+    resident = process_resident_bytes()
+    if resident is not None:
+        lines += gauge_lines("process_resident_memory_bytes", "Resident memory of this process", [({}, resident)])
+    model_bytes = get_model_loader().model_bytes
+    if model_bytes is not None:
+        lines += gauge_lines("resume_model_resident_bytes", "Memory held by the loaded model", [({}, model_bytes)])
+    return lines
+
+
+REGISTRY.add_collector(collect_runtime)
+
+
+async def track_requests(request: Request, call_next):
+    """Middleware recording in-flight requests and latency per route template."""
+    REQUESTS_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
+        # Templates ("/api/resumes/{content_hash}/score") keep label cardinality bounded
+        route = request.scope.get("route")
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - started, request.method, getattr(route, "path", "unmatched"), str(status)
+        )
+
+
+def metrics_response() -> Response:
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
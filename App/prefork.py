@@ -0,0 +1,203 @@
+"""Pre-fork server: load the model once, then fork workers that share it.
+
+Usage::
+
+    python -m App.prefork main:app --preload main:load_model --port 8000
+    python -m App.prefork App.main:app --preload App.AI.tailor:load_model
+
+The master imports the application, runs the ``--preload`` callable that
+loads the SentenceTransformer weights, freezes the garbage collector so
+refcount/GC bookkeeping does not dirty the shared pages, binds the
+listening socket and forks the workers. Each worker's background loader
+then finds the model already loaded and only runs the warmup.
+Tensor storage is never written after loading, so every worker reads the
+same physical pages copy-on-write. Models saved as ``model.safetensors`` are
+memory-mapped from disk by the loader, which additionally lets the page
+cache share them across restarts.
+"""
+import argparse
+import gc
+import importlib
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def available_cores() -> int:
+    """CPU cores this process may run on (respects container CPU sets)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def plan_workers(cores: int, workers: int = 0, threads: int = 0) -> Tuple[int, int]:
+    """Split the available cores into (worker processes, intra-op threads per worker)."""
+    if threads <= 0:
+        threads = 2 if cores >= 8 else 1
+    if workers <= 0:
+        workers = max(1, cores // threads)
+    return workers, threads
+
+
+def import_from_string(target: str):
+    module_name, _, attr = target.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attr) if attr else module
+
+
+def process_memory(pid: int) -> Dict[str, int]:
+    """RSS, PSS and shared/private bytes for a process, read from /proc."""
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as smaps:
+            for line in smaps:
+                parts = line.split()
+                if len(parts) >= 3 and parts[0].rstrip(":") in (
+                    "Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"
+                ):
+                    memory[parts[0].rstrip(":").lower()] = int(parts[1]) * 1024
+    except OSError:
+        pass
+    return memory
+
+
+def memory_report(workers: Dict[int, int]) -> str:
+    """Human readable RSS report for the master and every worker."""
+    lines = []
+    for label, pid in [("master", os.getpid())] + [(f"worker-{i}", pid) for pid, i in sorted(workers.items(), key=lambda x: x[1])]:
+        memory = process_memory(pid)
+        if not memory:
+            continue
+        shared = memory.get("shared_clean", 0) + memory.get("shared_dirty", 0)
+        private = memory.get("private_clean", 0) + memory.get("private_dirty", 0)
+        lines.append(
+            f"{label} pid={pid} rss={memory.get('rss', 0) / 2**20:.1f}MiB "
+            f"pss={memory.get('pss', 0) / 2**20:.1f}MiB shared={shared / 2**20:.1f}MiB "
+            f"private={private / 2**20:.1f}MiB"
+        )
+    return "\n".join(lines)
+
+
+def _run_worker(app, sock: socket.socket, threads: int, args: argparse.Namespace):
+    import uvicorn
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGUSR1, signal.SIG_DFL)
+    os.environ["TORCH_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    # Each worker gets a single parsing process unless configured otherwise
+    if "PARSING_WORKERS" not in os.environ:
+        from App import executors
+        kind, _ = executors.EXECUTOR_CONFIG["parsing"]
+        executors.EXECUTOR_CONFIG["parsing"] = (kind, 1)
+
+    config = uvicorn.Config(app, log_level=args.log_level, timeout_keep_alive=args.keep_alive)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork uvicorn server with shared model weights")
+    parser.add_argument("app", help="Application import string, e.g. main:app")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("PREFORK_WORKERS", "0")),
+                        help="Worker processes (default: cores / threads)")
+    parser.add_argument("--threads", type=int, default=int(os.getenv("PREFORK_THREADS", "0")),
+                        help="Torch intra-op threads per worker (default: from core count)")
+    parser.add_argument("--preload", default=None,
+                        help="Callable run in the master before forking, e.g. App.AI.tailor:load_model")
+    parser.add_argument("--report-interval", type=float, default=0,
+                        help="Log a per-worker memory report every N seconds (0 disables)")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--keep-alive", type=int, default=5)
+    args = parser.parse_args()
+
+    cores = available_cores()
+    workers, threads = plan_workers(cores, args.workers, args.threads)
+    logger.info(f"{cores} cores available: {workers} workers x {threads} intra-op threads")
+
+    # Load the model in the master with a single thread so no OpenMP pool exists at fork time
+    os.environ["TORCH_NUM_THREADS"] = "1"
+    sys.path.insert(0, os.getcwd())
+    start = time.perf_counter()
+    app = import_from_string(args.app)
+    if args.preload:
+        import_from_string(args.preload)()
+    logger.info(f"Application loaded in master in {time.perf_counter() - start:.2f}s")
+
+    gc.collect()
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(app, sock, threads, args)
+            finally:
+                os._exit(0)
+        children[pid] = index
+        logger.info(f"Started worker-{index} (pid {pid})")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def report(signum=None, frame=None):
+        logger.info("Memory report:\n" + memory_report(children))
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGUSR1, report)
+
+    for index in range(workers):
+        spawn(index)
+
+    next_report = time.monotonic() + args.report_interval if args.report_interval else None
+    while children:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            index = children.pop(pid, None)
+            if index is not None and not stopping:
+                logger.error(f"worker-{index} (pid {pid}) exited with status {status}, restarting")
+                spawn(index)
+            continue
+        if next_report is not None and time.monotonic() >= next_report:
+            report()
+            next_report = time.monotonic() + args.report_interval
+        time.sleep(0.5)
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import io
+import logging
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Optional TTF used for body text instead of the built-in Helvetica
+PDF_FONT_PATH = os.getenv("RESUME_PDF_FONT")
+# Total size of rendered PDFs kept in memory
+RENDER_CACHE_BYTES = int(os.getenv("RENDER_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+
+@lru_cache(maxsize=None)
+def get_styles() -> Dict:
+    """Fonts and paragraph styles, built once per process on the first render.
+
+    reportlab is only imported here and in render_pdf, so it stays out of
+    application startup.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    body_font = "Helvetica"
+    if PDF_FONT_PATH:
+        try:
+            pdfmetrics.registerFont(TTFont("ResumeBody", PDF_FONT_PATH))
+            body_font = "ResumeBody"
+        except Exception as e:
+            logger.error(f"Error registering font {PDF_FONT_PATH}: {str(e)}")
+    styles = getSampleStyleSheet()
+    return {
+        "title": ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            spaceAfter=20,
+            textColor=colors.HexColor('#2c3e50')
+        ),
+        "section": ParagraphStyle(
+            'CustomSection',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceAfter=10,
+            textColor=colors.HexColor('#3498db')
+        ),
+        "body": ParagraphStyle(
+            'CustomBody',
+            parent=styles['Normal'],
+            fontName=body_font,
+            fontSize=10,
+            spaceAfter=5,
+            leading=14
+        ),
+    }
+
+
+def render_pdf(resume_text: str) -> bytes:
+    """Lay out resume text as a PDF; top level so it can run in a worker process.
+
+    Every line is its own paragraph and blank lines separate blocks, so the
+    layout of format_resume_section output is kept. All-caps lines are
+    section headers and ``=`` underlines are dropped.
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+    styles = get_styles()
+    try:
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
+
+        story = []
+        for line in resume_text.split('\n'):
+            line = line.strip()
+            if not line:
+                # Blank line between blocks
+                if story:
+                    story.append(Spacer(1, 5))
+                continue
+            if line.startswith('='):
+                # Skip separator lines
+                continue
+            # Paragraph parses markup, so the text itself must be escaped
+            markup = escape(line)
+            if line.upper() == line and line.lower() != line and not line.startswith('['):
+                # This is a section header
+                story.append(Paragraph(markup, styles["section"]))
+            else:
+                # This is body text
+                story.append(Paragraph(markup, styles["body"]))
+
+        doc.build(story)
+        return buffer.getvalue()
+    except Exception as e:
+        logger.error(f"Error generating PDF: {str(e)}")
+        raise
+
+
+class ZipStream:
+    """Write-only file object that hands zipfile output back in chunks.
+
+    It has no ``seek``, so zipfile writes entries with data descriptors and
+    never needs to go back into bytes that were already sent.
+    """
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._offset = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def stream_zip(entries: AsyncIterator[Tuple[str, bytes]]) -> AsyncIterator[bytes]:
+    """Zip (name, data) entries as they arrive, yielding archive bytes after each one."""
+    sink = ZipStream()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        async for name, data in entries:
+            archive.writestr(name, data)
+            yield sink.drain()
+    # Central directory, written when the archive closes
+    yield sink.drain()
+
+
+class RenderCache:
+    """Rendered PDFs keyed by (analysis id, content hash), bounded by total bytes (LRU)."""
+    def __init__(self, max_bytes: int = RENDER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, analysis_id: str, digest: str) -> Optional[bytes]:
+        key = (analysis_id, digest)
+        with self._lock:
+            pdf = self._entries.get(key)
+            if pdf is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return pdf
+
+    def put(self, analysis_id: str, digest: str, pdf: bytes):
+        key = (analysis_id, digest)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            if len(pdf) > self.max_bytes:
+                return
+            self._entries[key] = pdf
+            self._size += len(pdf)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_cache: Optional[RenderCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> RenderCache:
+    """Process wide PDF cache sized by RENDER_CACHE_BYTES."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = RenderCache()
+    return _cache
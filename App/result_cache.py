@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .AI.backends import INFERENCE_BACKEND
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL", "3600"))
+# Bump when scoring or the analysis format changes so stale results are not served
+ANALYSIS_VERSION = "1"
+
+
+def result_key(kind: str, upload_digest: str, job_description: str, model_name: str) -> str:
+    """Cache key for one analysis: pipeline, upload content, job description and model/version."""
+    digest = hashlib.sha256()
+    for part in (kind, ANALYSIS_VERSION, model_name, INFERENCE_BACKEND, upload_digest, job_description.strip()):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """TTL + LRU cache of finished analyses with single-flight computation.
+
+    ``get_or_compute`` runs the computation once per key: concurrent callers
+    with the same key await the in-flight task instead of starting their own.
+    The task is shielded, so a caller that disconnects does not cancel the
+    work the others are waiting on. Failures are not cached.
+
+    ``release`` hands over a resource the computation reads, such as the
+    request's upload: it is called once the task that ran ``compute``
+    finishes, or immediately when this caller does not start one.
+    """
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl_seconds: float = TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expired = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expired += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]],
+                             release: Optional[Callable[[], None]] = None) -> Any:
+        value = self.get(key)
+        if value is not None:
+            if release is not None:
+                release()
+            return value
+        task = self._in_flight.get(key)
+        if task is not None:
+            with self._lock:
+                self.coalesced += 1
+            if release is not None:
+                release()
+        else:
+            task = asyncio.ensure_future(self._compute(key, compute, release))
+            self._in_flight[key] = task
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[Any]],
+                       release: Optional[Callable[[], None]] = None) -> Any:
+        try:
+            value = await compute()
+            self.put(key, value)
+            return value
+        finally:
+            self._in_flight.pop(key, None)
+            if release is not None:
+                release()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "coalesced": self.coalesced,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "in_flight": len(self._in_flight),
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Process wide result cache configured from RESULT_CACHE_* environment variables."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResultCache()
+    return _cache
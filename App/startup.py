@@ -0,0 +1,145 @@
+import logging
+import os
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Set MODEL_WARMUP=0 to skip the warmup encodes
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1") == "1"
+# Batch sizes encoded once after loading so the first requests do not pay for kernel/allocator setup
+WARMUP_BATCH_SIZES = [int(size) for size in os.getenv("WARMUP_BATCH_SIZES", "1,8,32").split(",") if size.strip()]
+# Short requirement-like and long paragraph-like sentences, the two shapes requests mostly send
+WARMUP_SENTENCES = [
+    "Experienced software engineer with Python and cloud infrastructure skills.",
+    "Led a cross-functional team of engineers to design, build and operate data pipelines processing "
+    "millions of events per day, improving reliability and cutting infrastructure costs by a third.",
+]
+
+
+def process_uptime() -> Optional[float]:
+    """Seconds since this process was started, from /proc; None where unavailable."""
+    try:
+        with open("/proc/self/stat", "r") as stat_file:
+            # The command name may contain spaces, so split after its closing parenthesis
+            fields = stat_file.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime", "r") as uptime_file:
+            system_uptime = float(uptime_file.read().split()[0])
+        return system_uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def warm_up(encode: Callable[[List[str]], Any], batch_sizes: List[int] = WARMUP_BATCH_SIZES):
+    """Encode each representative batch shape once."""
+    for batch_size in batch_sizes:
+        for sentence in WARMUP_SENTENCES:
+            encode([sentence] * batch_size)
+
+
+def model_bytes(model) -> Optional[int]:
+    """Bytes held by a torch model's parameters and buffers; None for other backends."""
+    if not hasattr(model, "parameters"):
+        return None
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+class ModelLoader:
+    """Loads the model on a background thread and tracks startup phases.
+
+    ``start`` returns immediately, so the server binds its port and answers
+    liveness checks while the weights load; readiness flips once loading and
+    warmup are done. Phases are recorded in seconds: ``import`` (process
+    start, or this module's import, until ``mark_imported``),
+    ``weight_load`` and ``warmup``.
+    """
+    def __init__(self):
+        self._created = time.monotonic()
+        uptime = process_uptime()
+        self._process_started = self._created - uptime if uptime is not None else self._created
+        self.phases: Dict[str, float] = {}
+        # Parameter and buffer bytes of the loaded model, when it exposes them
+        self.model_bytes: Optional[int] = None
+        self.state = "starting"
+        self.error: Optional[str] = None
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def mark_imported(self):
+        """Call once the application module has finished importing."""
+        self.phases.setdefault("import", time.monotonic() - self._process_started)
+
+    def start(self, load: Callable[[], Any], warmup: Optional[Callable[[Any], None]] = None):
+        """Run load() and then warmup(model) on a daemon thread; later calls are no-ops."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, args=(load, warmup), name="model-loader", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self, load: Callable[[], Any], warmup: Optional[Callable[[Any], None]]):
+        try:
+            self.state = "loading"
+            started = time.monotonic()
+            model = load()
+            self.phases["weight_load"] = time.monotonic() - started
+            self.model_bytes = model_bytes(model)
+            if warmup is not None and MODEL_WARMUP:
+                self.state = "warming_up"
+                started = time.monotonic()
+                warmup(model)
+                self.phases["warmup"] = time.monotonic() - started
+            self.state = "ready"
+            self._ready.set()
+            logger.info(f"Model ready; startup phases: {self.report()['phases']}")
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            logger.error(f"Error loading model: {str(e)}")
+            logger.error(traceback.format_exc())
+
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def report(self) -> Dict:
+        phases = {name: round(seconds, 3) for name, seconds in self.phases.items()}
+        return {
+            "state": self.state,
+            "ready": self.ready(),
+            "error": self.error,
+            "phases": phases,
+            "total": round(sum(phases.values()), 3),
+        }
+
+
+_loader: Optional[ModelLoader] = None
+_loader_lock = threading.Lock()
+
+
+def get_model_loader() -> ModelLoader:
+    """Process wide loader; create it early so the import phase is measured from process start."""
+    global _loader
+    if _loader is None:
+        with _loader_lock:
+            if _loader is None:
+                _loader = ModelLoader()
+    return _loader
+
+
+def require_model():
+    """Route dependency answering 503 until the model is loaded and warmed up."""
+    if not get_model_loader().ready():
+        raise HTTPException(status_code=503, detail="Model is still loading", headers={"Retry-After": "5"})
@@ -0,0 +1,163 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MEMORY_ENTRIES = int(os.getenv("PARSED_CACHE_SIZE", "512"))
+DISK_ENTRIES = int(os.getenv("PARSED_CACHE_DISK_ENTRIES", "100000"))
+# Set PARSED_CACHE_DB to an empty string to keep the cache in memory only
+DISK_PATH = os.getenv("PARSED_CACHE_DB", "parsed_cache.db")
+# Disk hits whose recency is written in one batch, with the next insert or once this many collect
+TOUCH_BATCH = 100
+
+
+class ParsedDocument:
+    def __init__(self, text: str, sentences: List[str]):
+        self.text = text
+        self.sentences = sentences
+
+
+class ParsedTextCache:
+    """Extracted text and sentence segmentation keyed by upload content hash.
+
+    Entries are namespaced by ``kind`` (the extractor/segmenter that produced
+    them) so pipelines that clean or split text differently never share rows.
+    A bounded LRU sits in front of an optional SQLite table. Both methods do
+    SQLite I/O, so async callers run them off the event loop. Recency of disk
+    hits is approximate: it is written in batches rather than one commit per hit.
+    """
+    def __init__(self, max_entries: int = MEMORY_ENTRIES, db_path: Optional[str] = DISK_PATH,
+                 max_disk_entries: int = DISK_ENTRIES):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[Tuple[str, str], ParsedDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._touched: Dict[Tuple[str, str], float] = {}
+        if db_path:
+            try:
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                # The cache can be rebuilt, so a commit need not wait for fsync
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS parsed_text ("
+                    "digest TEXT NOT NULL, kind TEXT NOT NULL, text TEXT NOT NULL, "
+                    "sentences TEXT NOT NULL, last_used REAL NOT NULL, "
+                    "PRIMARY KEY (digest, kind))"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS parsed_text_last_used ON parsed_text (last_used)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Error opening parsed text cache {db_path}: {str(e)}")
+                self._db = None
+
+    def _remember(self, key: Tuple[str, str], document: ParsedDocument):
+        self._memory[key] = document
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _write_touched(self):
+        """Queue the last_used updates of recent disk hits in the current transaction."""
+        touched, self._touched = self._touched, {}
+        self._db.executemany(
+            "UPDATE parsed_text SET last_used = ? WHERE digest = ? AND kind = ?",
+            [(used,) + key for key, used in touched.items()]
+        )
+
+    def get(self, digest: str, kind: str) -> Optional[ParsedDocument]:
+        key = (digest, kind)
+        with self._lock:
+            document = self._memory.get(key)
+            if document is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return document
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT text, sentences FROM parsed_text WHERE digest = ? AND kind = ?", key
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.error(f"Error reading parsed text cache: {str(e)}")
+                    row = None
+                if row is not None:
+                    document = ParsedDocument(row[0], json.loads(row[1]))
+                    self._remember(key, document)
+                    self.disk_hits += 1
+                    self._touched[key] = time.time()
+                    if len(self._touched) >= TOUCH_BATCH:
+                        try:
+                            self._write_touched()
+                            self._db.commit()
+                        except sqlite3.Error as e:
+                            logger.error(f"Error updating parsed text cache recency: {str(e)}")
+                    return document
+            self.misses += 1
+            return None
+
+    def put(self, digest: str, kind: str, text: str, sentences: List[str]) -> ParsedDocument:
+        key = (digest, kind)
+        document = ParsedDocument(text, sentences)
+        with self._lock:
+            self._remember(key, document)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO parsed_text VALUES (?, ?, ?, ?, ?)",
+                        key + (text, json.dumps(sentences), time.time())
+                    )
+                    self._touched.pop(key, None)
+                    if self._touched:
+                        self._write_touched()
+                    # Keep the persistent tier bounded by periodically dropping the least recently used rows
+                    self._writes += 1
+                    if self._writes % 100 == 0:
+                        self._db.execute(
+                            "DELETE FROM parsed_text WHERE rowid IN ("
+                            "SELECT rowid FROM parsed_text ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                            (self.max_disk_entries,)
+                        )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Error writing parsed text cache: {str(e)}")
+        return document
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "persistent": self._db is not None,
+            }
+
+
+_cache: Optional[ParsedTextCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_parsed_text_cache() -> ParsedTextCache:
+    """Process wide parsed text cache configured from PARSED_CACHE_* environment variables."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ParsedTextCache()
+    return _cache
@@ -0,0 +1,251 @@
+"""Opt-in per-request timelines in the Chrome trace-event format.
+
+A request is traced when it is picked by ``TRACE_SAMPLE_RATE``, or when it
+sends ``X-Trace: 1`` (``X-Trace: profile`` also records a cProfile dump) and
+the header is allowed: from every client with ``TRACE_ALLOW_HEADER=1``, or
+with an ``X-Trace-Token`` equal to ``TRACE_TOKEN``. Its spans are
+written to ``TRACE_DIR/<trace id>.trace.json``, which opens in Perfetto or
+chrome://tracing; the id is returned in the ``X-Trace-Id`` response header.
+
+Spans are recorded against the trace held in a context variable, so code
+outside a traced request pays one ``ContextVar.get`` per span. Each thread and
+each asyncio task gets its own track, executor work shows up on the worker
+that ran it, and batches formed by the inference scheduler are added to every
+trace that had sentences in them.
+"""
+import asyncio
+import contextvars
+import cProfile
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from fastapi import Request
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TRACE_DIR = os.getenv("TRACE_DIR", "traces")
+# Fraction of requests traced without the header, e.g. 0.01
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+# Also write a cProfile dump for sampled requests
+TRACE_PROFILE = os.getenv("TRACE_PROFILE", "0") == "1"
+# Oldest trace files are removed beyond this many
+TRACE_MAX_FILES = int(os.getenv("TRACE_MAX_FILES", "200"))
+TRACE_HEADER = "X-Trace"
+# The header is ignored unless every client may send it, or the request carries TRACE_TOKEN
+TRACE_ALLOW_HEADER = os.getenv("TRACE_ALLOW_HEADER", "0") == "1"
+TRACE_TOKEN = os.getenv("TRACE_TOKEN", "")
+TRACE_TOKEN_HEADER = "X-Trace-Token"
+
+_TRACE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class Trace:
+    """Complete ("X") events of one request, timestamped from time.monotonic."""
+    def __init__(self, name: str):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.started = time.monotonic()
+        self.pid = os.getpid()
+        self._events: List[Dict] = []
+        self._tracks: Dict[Tuple[int, Any], int] = {}
+        self._processes: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def _track(self, pid: int, key: Any, label: str) -> int:
+        """Small thread id for a (process, thread or task) pair, named on first use."""
+        with self._lock:
+            tid = self._tracks.get((pid, key))
+            if tid is None:
+                tid = self._tracks[(pid, key)] = len(self._tracks) + 1
+                self._events.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": label}})
+                if pid != self.pid and pid not in self._processes:
+                    self._processes.add(pid)
+                    self._events.append({"ph": "M", "name": "process_name", "pid": pid, "args": {"name": label}})
+            return tid
+
+    def current_track(self) -> int:
+        """The running asyncio task, or the current thread outside an event loop."""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        if task is not None:
+            return self._track(self.pid, id(task), task.get_name())
+        thread = threading.current_thread()
+        return self._track(self.pid, thread.ident, thread.name)
+
+    def add(self, name: str, start: float, end: float, args: Optional[Dict] = None,
+            pid: Optional[int] = None, tid: Optional[int] = None):
+        event = {
+            "ph": "X",
+            "name": name,
+            "ts": round((start - self.started) * 1e6, 3),
+            "dur": round(max(0.0, end - start) * 1e6, 3),
+            "pid": self.pid if pid is None else pid,
+            "tid": self.current_track() if tid is None else tid,
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._events.append(event)
+
+    def add_worker(self, name: str, start: float, end: float, pid: int, thread_id: int, label: str,
+                   args: Optional[Dict] = None):
+        """Span that ran on an executor worker, possibly in another process."""
+        self.add(name, start, end, args, pid=pid, tid=self._track(pid, thread_id, label))
+
+    def to_chrome(self) -> Dict:
+        with self._lock:
+            events = list(self._events)
+        events.append({"ph": "M", "name": "process_name", "pid": self.pid, "args": {"name": self.name}})
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"trace_id": self.trace_id, "request": self.name},
+        }
+
+
+_current: "contextvars.ContextVar[Optional[Trace]]" = contextvars.ContextVar("resume_trace", default=None)
+# cProfile allows one active profiler per interpreter on recent Pythons
+_profile_lock = threading.Lock()
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **args) -> Iterator[Dict]:
+    """Record the block as a span of the current trace; yields its args dict for late values."""
+    trace = _current.get()
+    if trace is None:
+        yield args
+        return
+    started = time.monotonic()
+    try:
+        yield args
+    finally:
+        trace.add(name, started, time.monotonic(), args)
+
+
+def trace_path(trace_id: str, suffix: str = ".trace.json") -> Optional[str]:
+    """File of a finished trace, or None for unknown or malformed ids."""
+    if not _TRACE_ID.match(trace_id):
+        return None
+    path = os.path.join(TRACE_DIR, trace_id + suffix)
+    return path if os.path.exists(path) else None
+
+
+def _prune(directory: str, keep: int):
+    files = [os.path.join(directory, name) for name in os.listdir(directory)]
+    files.sort(key=os.path.getmtime)
+    for path in files[:max(0, len(files) - keep)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def write_trace(trace: Trace, profile: Optional[cProfile.Profile] = None) -> str:
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    path = os.path.join(TRACE_DIR, trace.trace_id + ".trace.json")
+    with open(path, "w") as trace_file:
+        json.dump(trace.to_chrome(), trace_file)
+    if profile is not None:
+        profile.dump_stats(os.path.join(TRACE_DIR, trace.trace_id + ".prof"))
+    _prune(TRACE_DIR, TRACE_MAX_FILES)
+    return path
+
+
+def _header_allowed(request: Request) -> bool:
+    if TRACE_ALLOW_HEADER:
+        return True
+    if not TRACE_TOKEN:
+        return False
+    token = request.headers.get(TRACE_TOKEN_HEADER, "")
+    return hmac.compare_digest(token.encode("utf-8"), TRACE_TOKEN.encode("utf-8"))
+
+
+def _requested(request: Request) -> Tuple[bool, bool]:
+    """(trace, profile) for this request from an allowed header or the sampling rate."""
+    value = request.headers.get(TRACE_HEADER, "").strip().lower()
+    if value and _header_allowed(request):
+        if value == "profile":
+            return True, True
+        if value in ("1", "true", "yes"):
+            return True, False
+    if TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE:
+        return True, TRACE_PROFILE
+    return False, False
+
+
+async def trace_requests(request: Request, call_next):
+    """Middleware tracing opted-in or sampled requests until their response body has been sent.
+
+    Streaming endpoints keep working after the response starts, so the trace
+    is finished by a wrapper around the body iterator. The cProfile dump
+    covers the event loop thread only, including any other request it
+    interleaves with; executor workers show up in the trace instead.
+    """
+    traced, profiled = _requested(request)
+    if not traced:
+        return await call_next(request)
+
+    trace = Trace(f"{request.method} {request.url.path}")
+    token = _current.set(trace)
+    profile = None
+    if profiled and _profile_lock.acquire(blocking=False):
+        profile = cProfile.Profile()
+        profile.enable()
+    started = time.monotonic()
+
+    async def finish(status: int):
+        # Synchronous part first, so a cancelled stream still releases the profiler
+        if profile is not None:
+            profile.disable()
+            _profile_lock.release()
+        trace.add("request", started, time.monotonic(), {
+            "method": request.method,
+            "path": request.url.path,
+            "status": status,
+            "profiled": profile is not None,
+        })
+        try:
+            path = await asyncio.get_running_loop().run_in_executor(None, write_trace, trace, profile)
+            logger.info(f"Wrote trace for {trace.name} to {path}")
+        except Exception as e:
+            logger.error(f"Error writing trace {trace.trace_id}: {str(e)}")
+            logger.error(traceback.format_exc())
+
+    try:
+        response = await call_next(request)
+    except BaseException:
+        _current.reset(token)
+        await finish(500)
+        raise
+    # The body iterator runs in the endpoint's context, which still holds the trace
+    _current.reset(token)
+    response.headers["X-Trace-Id"] = trace.trace_id
+    body = response.body_iterator
+
+    async def traced_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            await finish(response.status_code)
+
+    response.body_iterator = traced_body()
+    return response
@@ -0,0 +1,172 @@
+import hashlib
+import logging
+import os
+import time
+import weakref
+from typing import Iterable, Optional, Union
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from .metrics import STAGE_SECONDS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+# Per-file byte limit and per-PDF page limit
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "50"))
+# Whole request limit for multi-file endpoints, enforced while the body is received
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", str(50 * 1024 * 1024)))
+# Room for the form fields (job description, ids) sent next to a single file
+FORM_FIELDS_BYTES = int(os.getenv("FORM_FIELDS_BYTES", str(1024 * 1024)))
+
+# Parser input: bytes held in memory, or a path worker processes can open
+Source = Union[bytes, str]
+
+
+class ReceivedUpload:
+    """An upload as Starlette received it, hashed in place without another copy.
+
+    Starlette buffers each file part in a SpooledTemporaryFile before the
+    endpoint runs. Parts it kept in memory are handed to the parsers as bytes;
+    parts it rolled to disk are handed over as ``/proc/<pid>/fd/<n>`` of a
+    duplicated descriptor, which worker processes can open by path and which
+    stays readable after the request closes its form, until ``close``.
+    """
+    def __init__(self, filename: str, size: int, digest: str, data: Optional[bytes] = None,
+                 descriptor: Optional[int] = None):
+        self.filename = filename
+        self.size = size
+        self.digest = digest
+        self._data = data
+        self.path: Optional[str] = None
+        self._finalizer = None
+        if descriptor is not None:
+            self.path = f"/proc/{os.getpid()}/fd/{descriptor}"
+            # Closes the descriptor if the upload is dropped without close()
+            self._finalizer = weakref.finalize(self, os.close, descriptor)
+
+    def source(self) -> Source:
+        """Bytes for in-memory uploads, otherwise the path of the received temp file."""
+        return self.path if self.path is not None else self._data
+
+    def close(self):
+        if self._finalizer is not None:
+            self._finalizer()
+        self.path = None
+        self._data = None
+
+
+async def open_upload(upload, max_bytes: int = MAX_UPLOAD_BYTES) -> ReceivedUpload:
+    """Size-check and hash an UploadFile where Starlette stored it."""
+    started = time.perf_counter()
+    if upload.size is not None and upload.size > max_bytes:
+        raise HTTPException(
+            status_code=413, detail=f"{upload.filename} exceeds the {max_bytes // (1024 * 1024)} MB upload limit"
+        )
+    await upload.seek(0)
+    descriptor = None
+    rolled = getattr(upload.file, "_rolled", True)
+    if rolled and os.path.isdir(f"/proc/{os.getpid()}/fd"):
+        digest = hashlib.sha256()
+        size = 0
+        while True:
+            chunk = await upload.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+        descriptor = os.dup(upload.file.fileno())
+        received = ReceivedUpload(upload.filename, size, digest.hexdigest(), descriptor=descriptor)
+    else:
+        # Without /proc a file on disk is read into memory like a small one
+        data = await upload.read()
+        received = ReceivedUpload(upload.filename, len(data), hashlib.sha256(data).hexdigest(), data=data)
+    await upload.seek(0)
+    if received.size > max_bytes:
+        received.close()
+        raise HTTPException(
+            status_code=413, detail=f"{upload.filename} exceeds the {max_bytes // (1024 * 1024)} MB upload limit"
+        )
+    STAGE_SECONDS.observe(time.perf_counter() - started, "upload_read")
+    return received
+
+
+def close_uploads(uploads: Iterable[ReceivedUpload]):
+    for upload in list(uploads):
+        upload.close()
+
+
+def check_page_limit(filename: str, page_count: int, max_pages: int = MAX_PDF_PAGES):
+    if page_count > max_pages:
+        raise HTTPException(
+            status_code=413, detail=f"{filename} has {page_count} pages; the limit is {max_pages}"
+        )
+
+
+class RequestTooLarge(HTTPException):
+    def __init__(self, limit: int):
+        super().__init__(status_code=413, detail=f"Request body exceeds the {limit // (1024 * 1024)} MB limit")
+
+
+class LimitRequestSize:
+    """ASGI middleware capping request bodies while they are received.
+
+    A ``Content-Length`` over the limit is rejected before the body is read;
+    otherwise bytes are counted as they arrive, so a chunked upload is cut
+    off as soon as it passes the limit. Paths in ``single_upload_paths`` take
+    one file, so their limit is MAX_UPLOAD_BYTES plus room for form fields.
+    """
+    def __init__(self, app, max_bytes: int = MAX_REQUEST_BYTES, single_upload_paths: Iterable[str] = ()):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.single_upload_paths = set(single_upload_paths)
+
+    def limit(self, path: str) -> int:
+        if path in self.single_upload_paths:
+            return MAX_UPLOAD_BYTES + FORM_FIELDS_BYTES
+        return self.max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limit = self.limit(scope["path"])
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length", b"").decode("latin-1")
+        if content_length.isdigit() and int(content_length) > limit:
+            await self.reject(limit, scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised into whatever is reading the body; FastAPI answers it with a 413
+                    raise RequestTooLarge(limit)
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except RequestTooLarge:
+            if response_started:
+                raise
+            await self.reject(limit, scope, receive, send)
+
+    async def reject(self, limit: int, scope, receive, send):
+        error = RequestTooLarge(limit)
+        await JSONResponse(status_code=error.status_code, content={"detail": error.detail})(scope, receive, send)
@@ -0,0 +1 @@
+"""Micro-benchmarks for the resume analysis pipeline, run with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,232 @@
+"""Benchmark the resume pipeline end to end on synthetic PDF/DOCX resumes, offline.
+
+Usage::
+
+    python -m benchmarks.pipeline [--pages 1,3,10] [--job-sentences 10,40] [--documents 5]
+                                  [--repeat 3] [--seed 0] [--output results.json] [--baseline old.json]
+
+Resumes of each page count are generated with reportlab and python-docx, and
+job descriptions with the given number of sentences. A small BERT encoder is
+built in a temporary directory from a vocabulary of the synthetic corpus with
+seeded random weights, so no model is downloaded and runs are comparable
+across commits. The embedding cache is disabled so every run encodes.
+
+Run it from the repository root; results are printed (and with ``--output``
+written) as JSON. ``--baseline`` adds the change against an earlier run.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+# Set before the app modules read them: no hub lookups and no cached embeddings
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ["EMBEDDING_CACHE_SIZE"] = "0"
+os.environ["EMBEDDING_CACHE_DIR"] = ""
+
+from App.AI.backends import build_standin_model
+from benchmarks.sections import HEADERS, SENTENCES
+
+LINES_PER_PAGE = 45
+REQUIREMENTS = [
+    "We are looking for a software engineer with strong Python skills",
+    "Experience designing data pipelines on AWS or another cloud platform",
+    "You will lead a small team and mentor junior engineers",
+    "Familiarity with SQL, PostgreSQL and Redis is required",
+    "Experience with Docker, Kubernetes and CI/CD pipelines is a plus",
+    "A degree in Computer Science or equivalent experience",
+    "Excellent communication skills and ownership of projects end to end",
+    "Knowledge of Java or Go and microservice architectures",
+]
+
+
+def synthetic_lines(rng: random.Random, pages: int) -> List[str]:
+    """About ``pages`` pages of resume lines: a header block, then sections of bullets."""
+    lines = ["Jane Doe", "jane@example.com | 555-0100"]
+    while len(lines) < pages * LINES_PER_PAGE:
+        lines.append(rng.choice(HEADERS))
+        lines += [f"- {rng.choice(SENTENCES)}." for _ in range(rng.randint(3, 15))]
+    return lines[:pages * LINES_PER_PAGE]
+
+
+def synthetic_pdf(lines: List[str]) -> bytes:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    for start in range(0, len(lines), LINES_PER_PAGE):
+        y = 740
+        for line in lines[start:start + LINES_PER_PAGE]:
+            pdf.drawString(54, y, line)
+            y -= 15
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def synthetic_docx(lines: List[str]) -> bytes:
+    from docx import Document
+
+    document = Document()
+    for line in lines:
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def synthetic_job(rng: random.Random, sentences: int) -> str:
+    return " ".join(f"{rng.choice(REQUIREMENTS)}." for _ in range(sentences))
+
+
+@contextmanager
+def static_directories():
+    """Both apps mount static directories relative to the working directory at import."""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as root:
+        workdir = os.path.join(root, "work")
+        os.makedirs(os.path.join(workdir, "frontend"))
+        os.makedirs(os.path.join(root, "Frontend", "images"))
+        os.chdir(workdir)
+        try:
+            yield
+        finally:
+            os.chdir(previous)
+
+
+def time_runs(fn: Callable, items: List, repeat: int) -> Dict:
+    """Best and median wall time over ``repeat`` passes of fn over every item."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        runs.append(time.perf_counter() - start)
+    best = min(runs)
+    return {
+        "documents": len(items),
+        "best_seconds": round(best, 4),
+        "median_seconds": round(statistics.median(runs), 4),
+        "ms_per_document": round(best / len(items) * 1000, 2),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict], baseline_path: str):
+    """Add the baseline's best time and the relative change to every matching row."""
+    with open(baseline_path, "r") as baseline_file:
+        baseline = {
+            (row["function"], row["pages"], row.get("job_sentences")): row
+            for row in json.load(baseline_file)["results"]
+        }
+    for row in results:
+        previous = baseline.get((row["function"], row["pages"], row.get("job_sentences")))
+        if previous is not None:
+            row["baseline_best_seconds"] = previous["best_seconds"]
+            row["change"] = round(row["best_seconds"] / previous["best_seconds"] - 1, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", default="1,3,10", help="Resume sizes in pages")
+    parser.add_argument("--job-sentences", default="10,40", help="Job description sizes in sentences")
+    parser.add_argument("--documents", type=int, default=5, help="Resumes per size")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dim", type=int, default=64, help="Hidden size of the synthetic encoder")
+    parser.add_argument("--output", help="Also write the JSON results here")
+    parser.add_argument("--baseline", help="Earlier results to compare against")
+    args = parser.parse_args()
+
+    page_sizes = [int(size) for size in args.pages.split(",")]
+    job_sizes = [int(size) for size in args.job_sentences.split(",")]
+    # Keep the per-paragraph INFO logging of the apps out of the output
+    logging.disable(logging.INFO)
+
+    rng = random.Random(args.seed)
+    corpora = {pages: [synthetic_lines(rng, pages) for _ in range(args.documents)] for pages in page_sizes}
+    jobs = {size: synthetic_job(rng, size) for size in job_sizes}
+    words = sorted({
+        word.strip(".,:&-()%").lower()
+        for text in HEADERS + SENTENCES + REQUIREMENTS for word in text.split()
+    } - {""})
+
+    with static_directories():
+        import main as api
+        from App import main as app
+        from App.AI import tailor
+
+    results = []
+    with tempfile.TemporaryDirectory() as model_dir:
+        encoder = build_standin_model(model_dir, dim=args.dim, vocabulary=words, seed=args.seed)
+        api.model = encoder
+        tailor.model = encoder
+
+        for pages, corpus in corpora.items():
+            texts = ["\n".join(lines) for lines in corpus]
+            pdfs = [synthetic_pdf(lines) for lines in corpus]
+            docxs = [synthetic_docx(lines) for lines in corpus]
+            stages = {
+                "main.extract_text_from_pdf": (api.extract_text_from_pdf, pdfs),
+                "main.extract_text_from_docx": (api.extract_text_from_docx, docxs),
+                "App.main.extract_text_from_pdf": (app.extract_text_from_pdf, pdfs),
+                "App.main.extract_text_from_docx": (app.extract_text_from_docx, docxs),
+                "tailor.extract_sections": (tailor.extract_sections, texts),
+                "tailor.extract_skills": (tailor.extract_skills, texts),
+            }
+            for name, (fn, items) in stages.items():
+                results.append({"function": name, "pages": pages, **time_runs(fn, items, args.repeat)})
+
+            for size, job in jobs.items():
+                stages = {
+                    "tailor.enhance_resume": lambda text: tailor.enhance_resume(text, job),
+                    "main.analyze_resume": lambda text: api.analyze_resume(text, job),
+                }
+                for name, fn in stages.items():
+                    results.append({
+                        "function": name, "pages": pages, "job_sentences": size,
+                        **time_runs(fn, texts, args.repeat),
+                    })
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+    import torch
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "encoder": {"hidden_size": args.dim, "layers": 2, "vocabulary": len(words)},
+        "repeat": args.repeat,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark resume section segmentation against the original per-line regex loop.
+
+Usage::
+
+    python -m benchmarks.sections [--resumes 2000] [--repeat 3] [--seed 0]
+"""
+import argparse
+import json
+import random
+import re
+import time
+from typing import Dict, List
+
+from App.AI.tailor import extract_sections
+
+HEADERS = [
+    "PROFESSIONAL SUMMARY", "Work Experience", "Experience:", "EDUCATION", "Technical Skills",
+    "Skills & Tools", "Key Projects", "Achievements", "Contact Information",
+]
+SENTENCES = [
+    "Developed data pipelines in Python and SQL for a cloud analytics team",
+    "Managed a team of five software engineers over three years",
+    "Designed and deployed services on AWS with Terraform",
+    "Led the migration of a Java monolith to microservices",
+    "Experience with Kubernetes, Docker and CI/CD pipelines",
+    "Improved query latency by 40% through indexing and caching",
+    "Bachelor of Science in Computer Science, University of Somewhere",
+    "Strong communication skills and a track record of mentoring",
+    "Python, Java, SQL, Go, React, PostgreSQL, Redis",
+    "Built an internal tool used by 200 analysts",
+]
+
+
+def legacy_extract_sections(text: str) -> Dict[str, List[str]]:
+    """The original implementation: every pattern searched on every lowercased line."""
+    sections = {}
+    current_section = "other"
+    current_content = []
+    section_headers = {
+        r'professional summary|summary|profile': 'Professional Summary',
+        r'experience|work history|employment': 'Professional Experience',
+        r'education|academic': 'Education',
+        r'skills|technical skills|core competencies': 'Skills',
+        r'projects|key projects': 'Projects',
+        r'achievements|accomplishments': 'Achievements',
+        r'contact|personal information': 'Contact Information'
+    }
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        is_header = False
+        for pattern, section_name in section_headers.items():
+            if re.search(pattern, line.lower()):
+                if current_section != "other" and current_content:
+                    sections[current_section] = current_content
+                current_section = section_name
+                current_content = []
+                is_header = True
+                break
+        if not is_header:
+            current_content.append(line)
+    if current_content:
+        sections[current_section] = current_content
+    return sections
+
+
+def synthetic_resume(rng: random.Random) -> str:
+    lines = ["Jane Doe", "jane@example.com | 555-0100", ""]
+    for header in rng.sample(HEADERS, rng.randint(4, len(HEADERS))):
+        lines.append(header)
+        for _ in range(rng.randint(3, 15)):
+            lines.append(f"- {rng.choice(SENTENCES)}.")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def best_of(fn, corpus: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resumes", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [synthetic_resume(rng) for _ in range(args.resumes)]
+    megabytes = sum(len(text) for text in corpus) / 2**20
+
+    legacy = best_of(legacy_extract_sections, corpus, args.repeat)
+    compiled = best_of(extract_sections, corpus, args.repeat)
+    print(json.dumps({
+        "resumes": len(corpus),
+        "corpus_mb": round(megabytes, 2),
+        "legacy_seconds": round(legacy, 4),
+        "compiled_seconds": round(compiled, 4),
+        "legacy_mb_per_s": round(megabytes / legacy, 2),
+        "compiled_mb_per_s": round(megabytes / compiled, 2),
+        "speedup": round(legacy / compiled, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
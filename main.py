@@ -1,24 +1,33 @@
-from fastapi import FastAPI, UploadFile, Form, HTTPException
+from fastapi import FastAPI, UploadFile, Form, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
-from typing import Dict
+from starlette.background import BackgroundTask
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import json
 import os
 from dotenv import load_dotenv
-import PyPDF2
-from docx import Document
-import io
-from sentence_transformers import SentenceTransformer, util
-import numpy as np
-import torch
 import logging
 import traceback
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
 import re
+from App.AI.embedding_cache import get_embedding_cache
+from App.AI.backends import load_backend
+from App.AI.matching import BatchMatch, match_batch, bucket_matches
+from App.AI.parser import extract_pdf_pages, extract_pdf_pages_parallel, engine_stats, open_source, pdf_page_count
+from App.text_cache import get_parsed_text_cache
+from App.result_cache import result_key, get_result_cache
+from App.uploads import LimitRequestSize, Source, open_upload, check_page_limit
+from App.executors import run_inference, run_parsing, start_executors, shutdown_executors, executor_stats
+from App.startup import get_model_loader, require_model, warm_up
+from App.metrics import metrics_response, stage_timer, track_requests
+from App.tracing import trace_path, trace_requests
+
+# torch, sentence_transformers, PyPDF2 and python-docx are imported where they
+# are used, so the server binds its port before paying for them
+if TYPE_CHECKING:
+    import PyPDF2
+    import torch
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -43,6 +52,13 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+# Cut off oversized request bodies while they are received
+app.add_middleware(LimitRequestSize, single_upload_paths=["/api/enhance-resume", "/api/enhance-resume/stream"])
+# Latency and in-flight requests for /metrics
+app.middleware("http")(track_requests)
+# Opt-in per-request timelines (TRACE_SAMPLE_RATE, or an allowed X-Trace header)
+app.middleware("http")(trace_requests)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="../Frontend/images"), name="static")
 
@@ -51,39 +67,62 @@ app.mount("/static", StaticFiles(directory="../Frontend/images"), name="static")
 async def get_favicon():
     return FileResponse("../Frontend/images/favicon.ico")
 
-# Load the pre-trained model
-try:
-    logger.info("Loading the pre-trained model...")
-    # Using a model better suited for resume analysis
-    model = SentenceTransformer('sentence-transformers/all-mpnet-base-v2')
-    logger.info("Model loaded successfully")
-except Exception as e:
-    logger.error(f"Error loading model: {str(e)}")
-    logger.error(traceback.format_exc())
-    raise
+# Using a model better suited for resume analysis
+MODEL_NAME = 'sentence-transformers/all-mpnet-base-v2'
+
+model = None
+
+def load_model():
+    """Load the model once per process; the pre-fork server calls this before forking."""
+    global model
+    if model is None:
+        try:
+            logger.info("Loading the pre-trained model...")
+            # torch fp32, dynamic int8 or ONNX Runtime, selected by INFERENCE_BACKEND
+            model = load_backend(MODEL_NAME)
+            logger.info("Model loaded successfully")
+        except Exception as e:
+            logger.error(f"Error loading model: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise
+    return model
+
+# Start the inference/parsing pools with the app and stop them with it
+@app.on_event("startup")
+async def startup_executors():
+    start_executors()
+    # The port is bound while the weights load; /health/ready reports when requests can be served
+    get_model_loader().start(load_model, lambda loaded: warm_up(loaded.encode))
 
+@app.on_event("shutdown")
+async def stop_executors():
+    shutdown_executors()
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
+def iter_pdf_pages(pdf_reader: "PyPDF2.PdfReader") -> Iterator[str]:
+    """Lazily extract and whitespace-normalize one PDF page at a time."""
+    for page in pdf_reader.pages:
+        page_text = page.extract_text()
+        # logger.info(f"PDF Page Content: {page_text[:200]}...")  # Log first 200 chars of each page
+        # Clean up the text by removing excessive whitespace and newlines
+        yield ' '.join(page_text.split())
+
+def join_pdf_pages(pages: List[str]) -> str:
+    """Whitespace-normalize each page and join them in one pass."""
+    return "\n\n".join(' '.join(page_text.split()) for page_text in pages).strip()
+
+def extract_text_from_pdf(source: Source) -> str:
     try:
-        pdf_file = io.BytesIO(file_bytes)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            page_text = page.extract_text()
-            # logger.info(f"PDF Page Content: {page_text[:200]}...")  # Log first 200 chars of each page
-            # Clean up the text by removing excessive whitespace and newlines
-            page_text = ' '.join(page_text.split())
-            text += page_text + "\n\n"
-        return text.strip()
+        return join_pdf_pages(extract_pdf_pages(source))
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {str(e)}")
         logger.error(traceback.format_exc())
         raise
 
-def extract_text_from_docx(file_bytes: bytes) -> str:
+def extract_text_from_docx(source: Source) -> str:
+    from docx import Document
     try:
-        docx_file = io.BytesIO(file_bytes)
-        doc = Document(docx_file)
+        with open_source(source) as docx_file:
+            doc = Document(docx_file)
         text = []
         for paragraph in doc.paragraphs:
             if paragraph.text.strip():
@@ -95,13 +134,13 @@ def extract_text_from_docx(file_bytes: bytes) -> str:
         logger.error(traceback.format_exc())
         raise
 
-def analyze_resume(resume_text: str, job_description: str) -> Dict:
+def analyze_resume(resume_text: str, job_description: str,
+                   resume_sections: Optional[List[str]] = None) -> Dict:
     try:
         logger.info("=== Starting Resume Analysis ===")
         
         # Clean up text
-        cleaned_text = re.sub(r'[^\w\s.,;:!?()\'\"-]', ' ', resume_text)
-        cleaned_text = re.sub(r'\s+', ' ', cleaned_text)
+        cleaned_text = clean_text(resume_text)
         
         # Prepare prompt for the model
         prompt = f"""Analyze this resume against the job description and provide a detailed analysis.
@@ -121,126 +160,253 @@ Please analyze the match between the resume and job requirements, considering:
 
 Format the response with clear sections and specific examples."""
 
-        # Get embeddings for the full texts
-        resume_embedding = model.encode(cleaned_text, convert_to_tensor=True)
-        job_embedding = model.encode(job_description, convert_to_tensor=True)
-        
-        # Calculate overall similarity score
-        similarity = util.pytorch_cos_sim(resume_embedding, job_embedding)[0][0].item()
-        match_score = int((similarity + 1) * 50)  # Convert to 0-100 scale
+        # Encode the full texts and every sentence in a single pass
+        alignment = align_sentences(cleaned_text, job_description, resume_sections)
         
-        # Generate analysis using the model's understanding
-        analysis = f"""
+        with stage_timer("formatting"):
+            return format_analysis(alignment, cleaned_text, job_description)
+    except Exception as e:
+        logger.error(f"Error in analyze_resume: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise
+
+def clean_text(text: str) -> str:
+    """Drop unusual characters and collapse whitespace."""
+    cleaned_text = re.sub(r'[^\w\s.,;:!?()\'\"-]', ' ', text)
+    return re.sub(r'\s+', ' ', cleaned_text)
+
+def format_analysis(alignment: "SentenceAlignment", cleaned_text: str, job_description: str) -> Dict:
+    """Build the analysis response from a computed alignment."""
+    # Calculate overall similarity score
+    similarity = alignment.overall_similarity
+    match_score = int((similarity + 1) * 50)  # Convert to 0-100 scale
+    
+    # Generate analysis using the model's understanding
+    analysis = f"""
         1. Overall Match Score: {match_score}/100
         
         2. Key Strengths:
-        {generate_strengths(cleaned_text, job_description)}
+        {generate_strengths(alignment)}
         
         3. Suggested Improvements:
-        {generate_improvements(cleaned_text, job_description)}
+        {generate_improvements(alignment)}
         
         4. Areas that need attention:
-        {generate_gaps(cleaned_text, job_description)}
+        {generate_gaps(alignment)}
         
         5. Overall Assessment:
         {generate_assessment(match_score, cleaned_text, job_description)}
         """
+    
+    return {
+        "analysis": analysis,
+        "match_score": match_score
+    }
+
+class SentenceAlignment:
+    """Shared similarity data for one resume/job description pair."""
+    def __init__(self, resume_sections: List[str], job_requirements: List[str],
+                 match: BatchMatch, overall_similarity: float, index: int = 0):
+        self.resume_sections = resume_sections
+        self.job_requirements = job_requirements
+        # Pair ``index`` of a match_batch result: best sentence and strong/moderate/gap bucket per requirement
+        self.match = match
+        self.index = index
+        self.overall_similarity = overall_similarity
+
+    def bucket(self, bucket: "torch.Tensor", limit: int, descending: bool = True) -> List[Tuple[str, str, float]]:
+        """Return (requirement, best resume sentence, similarity) for the requirements in a bucket."""
+        return [
+            (self.job_requirements[req], self.resume_sections[idx], score)
+            for req, idx, score in bucket_matches(self.match, self.index, bucket, limit, descending)
+        ]
+
+    def strengths(self, limit: int = 5) -> List[Tuple[str, str, float]]:
+        return self.bucket(self.match.strong, limit)
+
+    def improvements(self, limit: int = 3) -> List[Tuple[str, str, float]]:
+        return self.bucket(self.match.moderate, limit)
+
+    def gaps(self, limit: int = 3) -> List[Tuple[str, str, float]]:
+        return self.bucket(self.match.gaps, limit, descending=False)
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into non-empty sentences."""
+    return [s.strip() for s in text.split('.') if s.strip()]
+
+def align_sentences(resume: str, job_desc: str,
+                    resume_sections: Optional[List[str]] = None) -> SentenceAlignment:
+    """Segment and encode both texts once and build the shared similarity matrix.
+    
+    ``resume_sections`` may be passed in when the segmentation is already cached.
+    """
+    from sentence_transformers import util
+    with stage_timer("sentence_split"):
+        if resume_sections is None:
+            resume_sections = split_sentences(resume)
+        job_requirements = split_sentences(job_desc)
+    
+    # One batched encode: full resume, full job description, then every sentence.
+    # Sentences seen in earlier requests are served from the embedding cache.
+    embeddings = get_embedding_cache().encode(
+        model, MODEL_NAME,
+        [resume, job_desc] + resume_sections + job_requirements,
+        convert_to_tensor=True
+    )
+    with stage_timer("similarity"):
+        overall_similarity = util.pytorch_cos_sim(embeddings[0], embeddings[1])[0][0].item()
         
-        return {
-            "analysis": analysis,
-            "match_score": match_score
-        }
-    except Exception as e:
-        logger.error(f"Error in analyze_resume: {str(e)}")
-        logger.error(traceback.format_exc())
-        raise
+        split = 2 + len(resume_sections)
+        resume_embeddings = embeddings[2:split]
+        job_embeddings = embeddings[split:]
+        
+        match = match_batch([resume_embeddings], job_embeddings)
+    return SentenceAlignment(resume_sections, job_requirements, match, overall_similarity)
 
-def generate_strengths(resume: str, job_desc: str) -> str:
-    """Generate strengths based on semantic understanding."""
-    # Get embeddings for key sections
-    resume_sections = [s.strip() for s in resume.split('.') if s.strip()]
-    job_requirements = [s.strip() for s in job_desc.split('.') if s.strip()]
+def sse_event(event: str, data: Dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_analysis(pages: Iterator[str], page_count: Optional[int], job_description: str,
+                    on_result: Optional[Callable[[Dict], None]] = None) -> Iterator[str]:
+    """Analyze a resume page by page, yielding progress, provisional score and result events.
+    
+    Sentences are segmented and encoded as each page arrives. A sentence that
+    runs over a page break is held back until its end is seen, so the final
+    sentences and scores match analyze_resume on the whole document. The
+    provisional score after each page compares the mean of the sentence
+    embeddings so far with the job description, so pages are encoded once;
+    only the final score encodes the whole document.
+    """
+    import torch
+    from sentence_transformers import util
+    cache = get_embedding_cache()
+    job_requirements = split_sentences(job_description)
+    job_embeddings = cache.encode(model, MODEL_NAME, [job_description] + job_requirements, convert_to_tensor=True)
+    job_embedding, job_embeddings = job_embeddings[0], job_embeddings[1:]
+    
+    raw_pages = []
+    resume_sections = []
+    section_embeddings = []
+    # Sum of the unit sentence embeddings so far; its direction is their mean's
+    running_sum = None
+    pending = ""
     
-    resume_embeddings = model.encode(resume_sections, convert_to_tensor=True)
-    job_embeddings = model.encode(job_requirements, convert_to_tensor=True)
+    def encode_sections(sections: List[str]):
+        nonlocal running_sum
+        if sections:
+            resume_sections.extend(sections)
+            embeddings = cache.encode(model, MODEL_NAME, sections, convert_to_tensor=True)
+            section_embeddings.append(embeddings)
+            page_sum = torch.nn.functional.normalize(embeddings, dim=-1).sum(dim=0)
+            running_sum = page_sum if running_sum is None else running_sum + page_sum
     
-    # Find strong matches
-    similarity_matrix = util.pytorch_cos_sim(resume_embeddings, job_embeddings)
-    strong_matches = []
+    def overall_similarity(cleaned_text: str) -> float:
+        resume_embedding = cache.encode(model, MODEL_NAME, [cleaned_text], convert_to_tensor=True)[0]
+        return util.pytorch_cos_sim(resume_embedding, job_embedding)[0][0].item()
     
-    for i, job_req in enumerate(job_requirements):
-        similarities = similarity_matrix[:, i]
-        top_idx = torch.argmax(similarities).item()
-        if similarities[top_idx] > 0.6:
-            strong_matches.append({
-                'resume': resume_sections[top_idx],
-                'requirement': job_req,
-                'similarity': similarities[top_idx].item()
+    for page_number, page_text in enumerate(pages, start=1):
+        raw_pages.append(page_text)
+        buffer = re.sub(r'\s+', ' ', f"{pending} {clean_text(page_text)}")
+        pieces = buffer.split('.')
+        pending = pieces.pop()
+        encode_sections([piece.strip() for piece in pieces if piece.strip()])
+        yield sse_event("progress", {
+            "stage": "extraction",
+            "page": page_number,
+            "pages": page_count,
+            "sentences": len(resume_sections)
+        })
+        
+        if running_sum is not None:
+            similarity = util.pytorch_cos_sim(running_sum, job_embedding)[0][0].item()
+            yield sse_event("score", {
+                "provisional": True,
+                "page": page_number,
+                "match_score": int((similarity + 1) * 50)
             })
     
+    if pending.strip():
+        encode_sections([pending.strip()])
+    
+    cleaned_text = clean_text("\n\n".join(raw_pages).strip())
+    if section_embeddings:
+        resume_embeddings = torch.cat(section_embeddings)
+    else:
+        resume_embeddings = job_embeddings.new_empty((0, job_embedding.shape[-1]))
+    with stage_timer("similarity"):
+        alignment = SentenceAlignment(
+            resume_sections, job_requirements, match_batch([resume_embeddings], job_embeddings),
+            overall_similarity(cleaned_text)
+        )
+    with stage_timer("formatting"):
+        result = format_analysis(alignment, cleaned_text, job_description)
+    if on_result is not None:
+        on_result(result)
+    yield sse_event("result", result)
+
+def stream_resume_analysis(upload, job_description: str, key: str) -> Iterator[str]:
+    """SSE body for /api/enhance-resume/stream; runs in Starlette's threadpool.
+    
+    The final result is stored in the result cache under ``key``; the
+    response closes ``upload`` once it is done.
+    """
+    import PyPDF2
+    
+    def on_result(result: Dict):
+        get_result_cache().put(key, result)
+    
+    try:
+        if upload.filename.lower().endswith('.pdf'):
+            with open_source(upload.source()) as pdf_file:
+                pdf_reader = PyPDF2.PdfReader(pdf_file)
+                check_page_limit(upload.filename, len(pdf_reader.pages))
+                yield from stream_analysis(iter_pdf_pages(pdf_reader), len(pdf_reader.pages), job_description, on_result)
+        else:
+            yield from stream_analysis(iter([extract_text_from_docx(upload.source())]), 1, job_description, on_result)
+    except HTTPException as e:
+        yield sse_event("error", {"detail": e.detail})
+    except Exception as e:
+        logger.error(f"Error in stream_resume_analysis: {str(e)}")
+        logger.error(traceback.format_exc())
+        yield sse_event("error", {"detail": str(e)})
+
+def generate_strengths(alignment: SentenceAlignment) -> str:
+    """Generate strengths based on semantic understanding."""
+    # Requirements whose best match is strong, highest similarity first
+    strong_matches = alignment.strengths(limit=5)
+    
     if not strong_matches:
         return "- No strong matches found"
     
     return '\n'.join([
-        f"- Your experience in '{match['resume']}' strongly aligns with the requirement: '{match['requirement']}'."
-        for match in sorted(strong_matches, key=lambda x: x['similarity'], reverse=True)[:5]
+        f"- Your experience in '{resume_section}' strongly aligns with the requirement: '{job_req}'."
+        for job_req, resume_section, _ in strong_matches
     ])
 
-def generate_improvements(resume: str, job_desc: str) -> str:
+def generate_improvements(alignment: SentenceAlignment) -> str:
     """Generate improvement suggestions based on semantic understanding."""
-    resume_sections = [s.strip() for s in resume.split('.') if s.strip()]
-    job_requirements = [s.strip() for s in job_desc.split('.') if s.strip()]
-    
-    resume_embeddings = model.encode(resume_sections, convert_to_tensor=True)
-    job_embeddings = model.encode(job_requirements, convert_to_tensor=True)
-    
-    similarity_matrix = util.pytorch_cos_sim(resume_embeddings, job_embeddings)
-    moderate_matches = []
-    
-    for i, job_req in enumerate(job_requirements):
-        similarities = similarity_matrix[:, i]
-        top_idx = torch.argmax(similarities).item()
-        if 0.4 <= similarities[top_idx] <= 0.6:
-            moderate_matches.append({
-                'resume': resume_sections[top_idx],
-                'requirement': job_req,
-                'similarity': similarities[top_idx].item()
-            })
+    moderate_matches = alignment.improvements(limit=3)
     
     if not moderate_matches:
         return "- No moderate matches found"
     
     return '\n'.join([
-        f"- Your experience with '{match['resume']}' partially matches the requirement: '{match['requirement']}'."
-        for match in sorted(moderate_matches, key=lambda x: x['similarity'], reverse=True)[:3]
+        f"- Your experience with '{resume_section}' partially matches the requirement: '{job_req}'."
+        for job_req, resume_section, _ in moderate_matches
     ])
 
-def generate_gaps(resume: str, job_desc: str) -> str:
+def generate_gaps(alignment: SentenceAlignment) -> str:
     """Generate gap analysis based on semantic understanding."""
-    resume_sections = [s.strip() for s in resume.split('.') if s.strip()]
-    job_requirements = [s.strip() for s in job_desc.split('.') if s.strip()]
-    
-    resume_embeddings = model.encode(resume_sections, convert_to_tensor=True)
-    job_embeddings = model.encode(job_requirements, convert_to_tensor=True)
-    
-    similarity_matrix = util.pytorch_cos_sim(resume_embeddings, job_embeddings)
-    gaps = []
-    
-    for i, job_req in enumerate(job_requirements):
-        similarities = similarity_matrix[:, i]
-        max_similarity = torch.max(similarities).item()
-        if max_similarity < 0.4:
-            gaps.append({
-                'requirement': job_req,
-                'similarity': max_similarity
-            })
+    # Weakest requirements first
+    gaps = alignment.gaps(limit=3)
     
     if not gaps:
         return "- No significant gaps found"
     
     return '\n'.join([
-        f"- The requirement '{gap['requirement']}' is not well represented in your resume."
-        for gap in sorted(gaps, key=lambda x: x['similarity'])[:3]
+        f"- The requirement '{job_req}' is not well represented in your resume."
+        for job_req, _, _ in gaps
     ])
 
 def generate_assessment(match_score: int, resume: str, job_desc: str) -> str:
@@ -252,30 +418,134 @@ def generate_assessment(match_score: int, resume: str, job_desc: str) -> str:
     else:
         return "Your resume needs significant enhancement to better match the job requirements."
 
-@app.post("/api/enhance-resume")
+@app.get("/api/embedding-cache/stats")
+async def embedding_cache_stats() -> Dict:
+    return get_embedding_cache().stats()
+
+@app.get("/api/parsed-cache/stats")
+async def parsed_cache_stats() -> Dict:
+    return get_parsed_text_cache().stats()
+
+@app.get("/api/pdf-engines/stats")
+async def pdf_engine_stats() -> Dict:
+    return engine_stats()
+
+@app.get("/api/result-cache/stats")
+async def result_cache_stats() -> Dict:
+    return get_result_cache().stats()
+
+@app.get("/api/executors/stats")
+async def executors_stats() -> Dict:
+    return executor_stats()
+
+@app.get("/metrics")
+async def metrics():
+    return metrics_response()
+
+@app.get("/api/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    path = trace_path(trace_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return FileResponse(path, media_type="application/json", filename=f"{trace_id}.trace.json")
+
+@app.get("/api/traces/{trace_id}/profile")
+async def get_trace_profile(trace_id: str):
+    path = trace_path(trace_id, ".prof")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{trace_id}.prof")
+
+@app.get("/health")
+async def health() -> Dict:
+    return {"status": "ok", **get_model_loader().report()}
+
+@app.get("/health/live")
+async def health_live() -> Dict:
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def health_ready():
+    report = get_model_loader().report()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
+@app.post("/api/enhance-resume", dependencies=[Depends(require_model)])
 async def analyze_resume_endpoint(
     resume: UploadFile,
     job_description: str = Form(...)
 ) -> Dict:
+    upload = None
+    handed_off = False
     try:
         if not resume.filename.lower().endswith(('.pdf', '.docx')):
             raise HTTPException(status_code=400, detail="File must be PDF or DOCX")
         
         # logger.info(f"Processing file: {resume.filename}")
-        file_content = await resume.read()
+        # Hashed where Starlette received it; the body size was capped while it arrived
+        upload = await open_upload(resume)
+        kind = "main.pdf" if resume.filename.lower().endswith('.pdf') else "main.docx"
         
-        if resume.filename.lower().endswith('.pdf'):
-            resume_text = extract_text_from_pdf(file_content)
-        else:
-            resume_text = extract_text_from_docx(file_content)
+        async def compute() -> Dict:
+            # Repeat uploads reuse their extracted text and segmentation
+            cache = get_parsed_text_cache()
+            # The cache reads and writes SQLite, so it stays off the event loop
+            document = await asyncio.to_thread(cache.get, upload.digest, kind)
+            if document is None:
+                # Parsing and inference run in their own pools so the event loop stays free
+                with stage_timer("extraction"):
+                    if kind == "main.pdf":
+                        page_count = await run_parsing(pdf_page_count, upload.source())
+                        check_page_limit(resume.filename, page_count)
+                        # Large PDFs are split into page ranges extracted in parallel
+                        pages = await extract_pdf_pages_parallel(upload.source(), run_parsing, page_count=page_count)
+                        resume_text = join_pdf_pages(pages)
+                    else:
+                        resume_text = await run_parsing(extract_text_from_docx, upload.source())
+                with stage_timer("sentence_split"):
+                    sentences = split_sentences(clean_text(resume_text))
+                document = await asyncio.to_thread(cache.put, upload.digest, kind, resume_text, sentences)
             
-        # logger.info("Extracted text from resume, starting analysis...")
-        analysis = analyze_resume(resume_text, job_description)
-        return analysis
+            # logger.info("Extracted text from resume, starting analysis...")
+            return await run_inference(analyze_resume, document.text, job_description, document.sentences)
+        
+        # Identical submissions are answered from the result cache; concurrent ones share one computation
+        key = result_key("main", upload.digest, job_description, MODEL_NAME)
+        # The shared computation may outlive this request, so the cache closes the upload
+        handed_off = True
+        return await get_result_cache().get_or_compute(key, compute, release=upload.close)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in analyze_resume_endpoint: {str(e)}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if upload is not None and not handed_off:
+            upload.close()
+
+@app.post("/api/enhance-resume/stream", dependencies=[Depends(require_model)])
+async def analyze_resume_stream_endpoint(
+    resume: UploadFile,
+    job_description: str = Form(...)
+):
+    if not resume.filename.lower().endswith(('.pdf', '.docx')):
+        raise HTTPException(status_code=400, detail="File must be PDF or DOCX")
+    upload = await open_upload(resume)
+    key = result_key("main", upload.digest, job_description, MODEL_NAME)
+    cached = get_result_cache().get(key)
+    if cached is not None:
+        body = iter([sse_event("result", cached)])
+    else:
+        body = stream_resume_analysis(upload, job_description, key)
+    # Runs once the response is done, even if the body was never iterated
+    return StreamingResponse(
+        body,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(upload.close)
+    )
+
+get_model_loader().mark_imported()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+import pytest
+
+from App.AI import backends
+from App.AI.backends import (DEFAULT_JOB_CORPUS, DEFAULT_RESUME_CORPUS, build_standin_model, check_parity,
+                             load_backend)
+
+
+@pytest.fixture(scope="module")
+def standin(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("standin") / "model")
+    build_standin_model(path)
+    return path
+
+
+@pytest.fixture(scope="module")
+def reference(standin):
+    return load_backend(standin, "torch")
+
+
+def test_int8_matches_fp32(standin, reference):
+    report = check_parity(reference, load_backend(standin, "int8"), DEFAULT_RESUME_CORPUS, DEFAULT_JOB_CORPUS)
+    assert report["embedding_drift_max"] < 1e-2
+    assert report["similarity_drift_max"] < 5e-2
+    assert report["match_score_drift"] < 1.0
+
+
+def test_onnx_matches_fp32(standin, reference, tmp_path, monkeypatch):
+    pytest.importorskip("onnxruntime")
+    monkeypatch.setattr(backends, "ONNX_CACHE_DIR", str(tmp_path))
+    candidate = load_backend(standin, "onnx")
+    assert os.path.exists(os.path.join(str(tmp_path), standin.replace("/", "__"), "model.onnx"))
+    report = check_parity(reference, candidate, DEFAULT_RESUME_CORPUS, DEFAULT_JOB_CORPUS)
+    assert report["embedding_drift_max"] < 1e-4
+    assert report["match_score_drift"] < 1e-2
+
+
+def test_backends_share_the_encode_interface(standin, reference):
+    candidate = load_backend(standin, "int8")
+    for model in (reference, candidate):
+        embeddings = model.encode(DEFAULT_JOB_CORPUS, convert_to_numpy=True)
+        assert embeddings.shape == (len(DEFAULT_JOB_CORPUS), 32)
+        np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), 1.0, atol=1e-5)
+        assert model.tokenizer is not None
+
+
+def test_unknown_backend_is_rejected(standin):
+    with pytest.raises(ValueError):
+        load_backend(standin, "tensorrt")
@@ -0,0 +1,59 @@
+import numpy as np
+
+from App.AI.embedding_cache import EmbeddingCache
+
+
+class CountingModel:
+    """Deterministic stand-in encoder that records every sentence it is asked to encode."""
+    def __init__(self, dim: int = 4):
+        self.dim = dim
+        self.calls = []
+
+    def encode(self, sentences, convert_to_numpy=True, **kwargs):
+        self.calls.append(list(sentences))
+        return np.array([[len(s), sum(map(ord, s)), i, 1.0] for i, s in enumerate(sentences)], dtype=np.float32)
+
+
+def test_only_misses_reach_the_model():
+    model = CountingModel()
+    cache = EmbeddingCache(max_entries=100)
+    first = cache.encode(model, "m", ["python developer", "team lead"])
+    second = cache.encode(model, "m", ["team lead", "sql", "python developer"])
+    assert model.calls == [["python developer", "team lead"], ["sql"]]
+    np.testing.assert_array_equal(second[0], first[1])
+    np.testing.assert_array_equal(second[2], first[0])
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 3
+
+
+def test_duplicates_and_normalized_text_encode_once():
+    model = CountingModel()
+    cache = EmbeddingCache(max_entries=100)
+    embeddings = cache.encode(model, "m", ["Team  lead", "Team lead", "Team  lead"])
+    assert model.calls == [["Team  lead"]]
+    assert embeddings.shape == (3, 4)
+
+
+def test_models_do_not_share_entries():
+    model = CountingModel()
+    cache = EmbeddingCache(max_entries=100)
+    cache.encode(model, "a", ["sql"])
+    cache.encode(model, "b", ["sql"])
+    assert model.calls == [["sql"], ["sql"]]
+
+
+def test_memory_tier_is_bounded_and_holds_copies():
+    model = CountingModel()
+    cache = EmbeddingCache(max_entries=2)
+    cache.encode(model, "m", ["a", "b", "c"])
+    assert cache.stats()["memory_entries"] == 2
+    assert all(vector.base is None for vector in cache._memory.values())
+
+
+def test_disk_tier_is_shared_between_caches(tmp_path):
+    model = CountingModel()
+    writer = EmbeddingCache(max_entries=100, disk_dir=str(tmp_path), disk_capacity=16)
+    expected = writer.encode(model, "m", ["python", "java"])
+    reader = EmbeddingCache(max_entries=100, disk_dir=str(tmp_path), disk_capacity=16)
+    np.testing.assert_array_equal(reader.encode(model, "m", ["java", "python"]), expected[::-1])
+    assert len(model.calls) == 1
+    assert reader.stats()["disk_hits"] == 2
@@ -0,0 +1,64 @@
+import torch
+from sentence_transformers import util
+
+from App.AI.matching import bucket_matches, match_batch
+
+
+def reference_score(similarity_matrix) -> int:
+    """Match score as the per-requirement loop computed it: the mean of each requirement's best sentence."""
+    best = torch.stack([torch.max(similarity_matrix[:, i]) for i in range(similarity_matrix.shape[1])])
+    return int((torch.mean(best).item() + 1) * 50)
+
+
+def random_pairs(seed: int, pairs: int = 40, dim: int = 16):
+    generator = torch.Generator().manual_seed(seed)
+    lengths = torch.randint(1, 30, (pairs,), generator=generator).tolist()
+    resumes = [torch.randn(n, dim, generator=generator) for n in lengths]
+    return resumes, generator
+
+
+def legacy_scores(resumes, jobs):
+    return [reference_score(util.pytorch_cos_sim(resume, job)) for resume, job in zip(resumes, jobs)]
+
+
+def test_shared_job_scores_match_legacy():
+    resumes, generator = random_pairs(0)
+    job = torch.randn(12, 16, generator=generator)
+    assert match_batch(resumes, job).match_scores.tolist() == legacy_scores(resumes, [job] * len(resumes))
+
+
+def test_per_pair_jobs_score_match_legacy():
+    resumes, generator = random_pairs(1)
+    jobs = [torch.randn(int(n), 16, generator=generator)
+            for n in torch.randint(1, 15, (len(resumes),), generator=generator)]
+    assert match_batch(resumes, jobs).match_scores.tolist() == legacy_scores(resumes, jobs)
+
+
+def test_padding_does_not_leak_into_top_matches():
+    resumes, generator = random_pairs(2, pairs=2)
+    resumes = [resumes[0][:1], torch.randn(10, 16, generator=generator)]
+    match = match_batch(resumes, torch.randn(4, 16, generator=generator))
+    assert match.best_indices[0].tolist() == [0, 0, 0, 0]
+    assert torch.isneginf(match.top_scores[0, :, 1:]).all()
+
+
+def test_empty_resume_scores_zero():
+    job = torch.randn(3, 8)
+    match = match_batch([torch.empty(0, 8), torch.randn(5, 8)], job)
+    assert match.match_scores[0].item() == 0
+    assert bucket_matches(match, 0, match.strong, 10) == []
+
+
+def test_no_sentences_on_either_side_scores_zero():
+    # What EmbeddingCache.encode returns for an empty sentence list
+    nothing = torch.empty(0, 0)
+    for jobs in (nothing, [nothing, nothing]):
+        match = match_batch([nothing, nothing], jobs)
+        assert match.match_scores.tolist() == [0, 0]
+        assert bucket_matches(match, 1, match.gaps, 10) == []
+
+
+def test_empty_job_scores_zero():
+    match = match_batch([torch.randn(3, 8)], torch.empty(0, 0))
+    assert match.match_scores.tolist() == [0]
+    assert match.similarity.shape == (1, 3, 0)
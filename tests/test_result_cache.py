@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from App.result_cache import ResultCache
+
+
+def test_concurrent_callers_share_one_computation():
+    cache = ResultCache()
+    calls = []
+    released = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        # The computation reads the first caller's resource; the others are released as they join
+        assert 0 not in released
+        return {"match_score": 80}
+
+    async def main():
+        return await asyncio.gather(*(
+            cache.get_or_compute("key", compute, release=lambda i=i: released.append(i)) for i in range(5)
+        ))
+
+    results = asyncio.run(main())
+    assert results == [{"match_score": 80}] * 5
+    assert calls == [1]
+    assert sorted(released) == [0, 1, 2, 3, 4]
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_cached_value_is_returned_without_computing():
+    cache = ResultCache()
+    released = []
+
+    async def compute():
+        return "first"
+
+    async def unexpected():
+        raise AssertionError("computed twice")
+
+    async def main():
+        await cache.get_or_compute("key", compute)
+        return await cache.get_or_compute("key", unexpected, release=lambda: released.append(1))
+
+    assert asyncio.run(main()) == "first"
+    assert released == [1]
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    cache = ResultCache()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(cache.get_or_compute("key", compute))
+        second = asyncio.ensure_future(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_failures_are_not_cached():
+    cache = ResultCache()
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return "ok"
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute("key", flaky)
+        return await cache.get_or_compute("key", flaky)
+
+    assert asyncio.run(main()) == "ok"
+    assert len(attempts) == 2
+
+
+def test_expired_entries_are_recomputed():
+    cache = ResultCache(ttl_seconds=0)
+    cache.put("key", "stale")
+    assert cache.get("key") is None
+    assert cache.stats()["expired"] == 1